@@ -192,6 +192,8 @@ export type WsInboundMessage =
       segmentEnd?: number | null;
     }
   | { t: 'ai_reply_pending' }
+  /** replyText increment while the model generates (only if hello.stream). */
+  | { t: 'ai_reply_partial'; delta: string }
   | { t: 'ai_reply'; replyText: string; meta?: AiReplyMeta }
   | { t: 'ai_reply_error'; message?: string };
 
@@ -208,6 +210,10 @@ export type WsOutboundMessage =
       tenant?: string | null;
       branch?: string | null;
       channel?: string | null;
+      /** Opt into ai_reply_partial frames; ai_reply still follows. */
+      stream?: boolean;
+      /** stt_partial frame encoding: 'msgpack' = binary frames, otherwise JSON text. */
+      enc?: 'json' | 'msgpack';
     }
   | { t: 'end' };
 
@@ -3,7 +3,8 @@ from __future__ import annotations
 import os
 import json
 import re
-from typing import Any, Dict, Optional, List, Tuple
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Optional, List, Tuple, Union
 import httpx
 
 # --------------------------- Configuration ---------------------------
@@ -24,6 +25,29 @@ INTENT_CONF_THRESHOLD = float(os.environ.get("INTENT_CONF_THRESHOLD", "0.6"))
 
 OPENAI_CHAT_URL = f"{OPENAI_BASE}/v1/chat/completions"
 
+# One pooled client for all OpenAI calls (keeps TLS connections warm between
+# turns). Created lazily so it binds to the running loop; closed via close_http().
+_HTTP: Optional[httpx.AsyncClient] = None
+
+
+def _http() -> httpx.AsyncClient:
+    global _HTTP
+    if _HTTP is None:
+        _HTTP = httpx.AsyncClient(
+            http2=True,
+            timeout=BRAIN_TIMEOUT_S,
+            limits=httpx.Limits(max_keepalive_connections=16, max_connections=32),
+        )
+    return _HTTP
+
+
+async def close_http() -> None:
+    global _HTTP
+    client, _HTTP = _HTTP, None
+    if client is not None:
+        await client.aclose()
+
+
 print("[brain] loaded from:", __file__)
 print("[brain] OPENAI_BASE=", OPENAI_BASE)
 print("[brain] OPENAI_CHAT_MODEL=", OPENAI_CHAT_MODEL)
@@ -69,6 +93,7 @@ def _clamp(s: str, max_chars: int) -> str:
 
 
 _BENGALI = re.compile(r"[\u0980-\u09FF]")
+_INT_RX = re.compile(r"(-?\d+)")
 
 
 def _guess_lang(text: str) -> str:
@@ -173,7 +198,7 @@ def _parse_quantity_any(value: Any, *, allow_zero: bool = False) -> Optional[int
         return None
 
     s_norm = s.translate(_BN_DIGIT_MAP)
-    m = re.search(r"(-?\d+)", s_norm)
+    m = _INT_RX.search(s_norm)
     if m:
         n = int(m.group(1))
         if n < 0:
@@ -214,7 +239,7 @@ def _parse_delta_any(value: Any) -> Optional[int]:
         return None
 
     s_norm = s.translate(_BN_DIGIT_MAP)
-    m = re.search(r"(-?\d+)", s_norm)
+    m = _INT_RX.search(s_norm)
     if not m:
         return None
 
@@ -321,6 +346,11 @@ def _build_menu_maps(menu_snapshot: Optional[Dict[str, Any]]):
     if not menu_snapshot:
         return id_to_name, token_to_id, id_to_aliases
 
+    # the server hands us its cached snapshot: build once per snapshot object
+    cached = menu_snapshot.get("_menu_maps")
+    if cached is not None:
+        return cached
+
     for it in (menu_snapshot.get("items") or []):
         _id = _normalize_id(
             it.get("id") or it.get("_id") or it.get("itemId")
@@ -343,6 +373,7 @@ def _build_menu_maps(menu_snapshot: Optional[Dict[str, Any]]):
             print("[debug][menu_maps] item:", name, "->", _id)
 
     print("[debug][menu_maps] built ids:", len(id_to_name))
+    menu_snapshot["_menu_maps"] = (id_to_name, token_to_id, id_to_aliases)
     return id_to_name, token_to_id, id_to_aliases
 
 
@@ -382,8 +413,7 @@ def _canonicalize_reply_text(
                 a = (alias or "").strip()
                 if not a or a == canonical:
                     continue
-                pattern = re.compile(re.escape(a), flags=re.IGNORECASE)
-                out = pattern.sub(canonical, out)
+                out = _alias_rx(a).sub(canonical, out)
 
         if _debug_has_kw(reply_text):
             print("[debug][canonicalize_replyText] before:", reply_text)
@@ -394,8 +424,28 @@ def _canonicalize_reply_text(
         return reply_text
 
 
+@lru_cache(maxsize=4096)
+def _alias_rx(alias: str) -> "re.Pattern[str]":
+    return re.compile(re.escape(alias), flags=re.IGNORECASE)
+
+
 # -------- Availability-aware fix: don't lie about items that exist ---------
 
+_NEG_PATTERNS = ("নেই", "not available", "nai", " নেই", " নাই")
+_NEG_ALT = "|".join(map(re.escape, _NEG_PATTERNS))
+
+
+@lru_cache(maxsize=4096)
+def _unavailable_claim_rx(name_l: str) -> "re.Pattern[str]":
+    """name ... neg OR neg ... name (loose window), any negation."""
+    n = re.escape(name_l)
+    return re.compile(f"{n}.{{0,16}}(?:{_NEG_ALT})|(?:{_NEG_ALT}).{{0,16}}{n}")
+
+
+@lru_cache(maxsize=4096)
+def _claim_sentence_rx(name: str) -> "re.Pattern[str]":
+    return re.compile(r"[^।.!?]*" + re.escape(name) + r"[^।.!?]*(?:।|\.|!|\?)")
+
 
 def _fix_false_unavailability(
     reply_text: str,
@@ -428,32 +478,18 @@ def _fix_false_unavailability(
 
         text = reply_text
         lower = reply_text.lower()
-        neg_patterns = ("নেই", "not available", "nai", " নেই", " নাই")
 
         for name in valid_names:
             name_l = name.lower()
             if name_l not in lower:
                 continue
 
-            for neg in neg_patterns:
-                # name ... neg OR neg ... name (loose window)
-                if re.search(
-                    re.escape(name_l) + r".{0,16}" + re.escape(neg),
-                    lower,
-                ) or re.search(
-                    re.escape(neg) + r".{0,16}" + re.escape(name_l),
-                    lower,
-                ):
-                    # remove the full sentence containing that claim
-                    pattern = (
-                        r"[^।.!?]*" + re.escape(name) +
-                        r"[^।.!?]*(?:।|\.|!|\?)"
-                    )
-                    new_text = re.sub(pattern, "", text).strip()
-                    if new_text:
-                        text = new_text
-                        lower = text.lower()
-                    break
+            if _unavailable_claim_rx(name_l).search(lower):
+                # remove the full sentence containing that claim
+                new_text = _claim_sentence_rx(name).sub("", text).strip()
+                if new_text:
+                    text = new_text
+                    lower = text.lower()
 
         return text or reply_text
     except Exception:
@@ -557,7 +593,78 @@ _LANG_DIRECTIVE = {
 }
 
 
-def _build_system_with_lang(
+# Static instructions, identical on every call: they form the prompt prefix
+# the provider can cache. Per-turn directives (language, lockedIntent) are
+# sent in a later system message, after the history.
+_SYSTEM_BASE = (
+    "You are the Qravy AI Waiter brain. "
+    "You MUST interpret the user's utterance (Bangla, English, or mixed) and map it to REAL menu items "
+    "from the provided unified candidates.\n"
+    "When the user mentions an item in Bangla, Banglish, or phonetic form (e.g. \"ক্রিস্পি কলামারি\", \"কলামারি\", "
+    "\"ডাইনামাইট শ্রিম্প\"), you MUST resolve it to the closest matching candidate item name such as "
+    "\"Crispy Calamari\" or \"Dynamite Shrimp\". "
+    "Be robust to minor ASR noise and spelling errors: always choose the best-matching item from the candidates "
+    "by semantic/phonetic similarity instead of defaulting to a random or popular item.\n"
+    "If lockedIntent=\"order\", you MUST reflect the user's requested items in the items[] array using those "
+    "resolved candidate IDs and quantities.\n"
+    "You receive a single [INPUT] JSON from the server with keys like: "
+    "userTranscript, Context, MenuHint. "
+    "SuggestionCandidates and UpsellCandidates arrive earlier in a [CANDIDATES] JSON system message. "
+    "Context may include timeOfDay, climate, channel, tenant, branch, languageHint, lastIntent, lockedIntent, etc. "
+    "Use Context and the provided candidates to propose a helpful reply. "
+    "Use SuggestionCandidates and UpsellCandidates as the primary pools when proposing items, "
+    "suggestions, or upsells, or filling items[]. "
+    "Use ONLY the unified AllowedCandidates (merged shortlist) provided by the backend. "
+    "Never invent items outside this set, even if MenuHint.items exist. "
+    "Never invent items or IDs outside these provided sets. "
+    "Always respect channel, visibility, and availability implied by the candidates. "
+    "Your entire reply MUST be exactly one valid JSON object with this shape: "
+    "{"
+    "\"replyText\": string (<= 280 chars), "
+    "\"intent\": \"order\"|\"menu\"|\"suggestions\"|\"chitchat\", "
+    "\"language\": \"bn\"|\"en\", "
+    "\"items\": ["
+    " {\"name\": string, \"itemId\": string, \"quantity\": integer >=1}"
+    "], "
+    "\"suggestions\": ["
+    " {\"title\": string, \"subtitle\"?: string, \"itemId\"?: string, \"categoryId\"?: string, \"price\"?: number}"
+    "], "
+    "\"upsell\": ["
+    " {\"title\": string, \"subtitle\"?: string, \"itemId\"?: string, \"categoryId\"?: string, \"price\"?: number}"
+    "], "
+    "\"decision\": {"
+    " \"showSuggestionsModal\"?: boolean, "
+    " \"showUpsellTray\"?: boolean"
+    "}, "
+    "\"cartOps\"?: ["
+    " {"
+    " \"op\": \"add\"|\"set\"|\"delta\"|\"remove\", "
+    " \"itemId\"?: string, "
+    " \"name\"?: string, "
+    " \"quantity\"?: integer, "
+    " \"delta\"?: integer"
+    " }"
+    "], "
+    "\"clearCart\"?: boolean, "
+    "\"notes\"?: string, "
+    "\"voiceReplyText\"?: string "
+    "}. "
+    "For Bangla users (language=\"bn\"), UI item names in replyText MUST remain exactly as in candidates/menu "
+    "(English or mixed) so they match the real menu. "
+    "In addition, when language=\"bn\" you MUST ALWAYS provide \"voiceReplyText\" as a natural Bangla-script reading "
+    "of the FULL replyText, including phonetic Bangla spellings for any English menu item names. "
+    "If language=\"en\", you MAY omit voiceReplyText or set it equal to replyText. "
+    "Do NOT add items that are not in candidates/menu. "
+    "Only suggest clearing the cart when the user clearly asks to cancel everything. "
+    "If the user specifies a number or quantity in their request (in any language), "
+    "use that count to limit how many suggestions or items you include."
+    " Keep replyText short and direct (max 280 chars)."
+    " Never list more than 5 items in suggestions or upsell."
+    " For menu/availability queries, show a concise subset instead of the full menu."
+)
+
+
+def _build_turn_directives(
     lang_hint: str,
     locked_intent: Optional[str],
 ) -> str:
@@ -568,7 +675,7 @@ def _build_system_with_lang(
 
     if locked_intent in ("order", "menu", "suggestions", "chitchat"):
         locked_intent_clause = (
-            f" The backend has ALREADY decided the intent for this turn as "
+            f"The backend has ALREADY decided the intent for this turn as "
             f"\"{locked_intent}\" (lockedIntent). You MUST treat this as FINAL: "
             f"- Set your \"intent\" field to exactly \"{locked_intent}\".\n"
             f"- Make sure replyText, items, suggestions, upsell, and decision are all consistent with \"{locked_intent}\".\n"
@@ -576,82 +683,11 @@ def _build_system_with_lang(
         )
     else:
         locked_intent_clause = (
-            " The backend will derive the final intent from the user's request and context. "
+            "The backend will derive the final intent from the user's request and context. "
             "Your \"intent\" is advisory and may be overridden."
         )
 
-    concision_clause = (
-        " Keep replyText short and direct (max 280 chars)."
-        " Never list more than 5 items in suggestions or upsell."
-        " For menu/availability queries, show a concise subset instead of the full menu."
-    )
-
-    return (
-        "You are the Qravy AI Waiter brain. "
-        "You MUST interpret the user's utterance (Bangla, English, or mixed) and map it to REAL menu items "
-        "from the provided unified candidates.\n"
-        "When the user mentions an item in Bangla, Banglish, or phonetic form (e.g. \"ক্রিস্পি কলামারি\", \"কলামারি\", "
-        "\"ডাইনামাইট শ্রিম্প\"), you MUST resolve it to the closest matching candidate item name such as "
-        "\"Crispy Calamari\" or \"Dynamite Shrimp\". "
-        "Be robust to minor ASR noise and spelling errors: always choose the best-matching item from the candidates "
-        "by semantic/phonetic similarity instead of defaulting to a random or popular item.\n"
-        "If lockedIntent=\"order\", you MUST reflect the user's requested items in the items[] array using those "
-        "resolved candidate IDs and quantities.\n"
-        "You receive a single [INPUT] JSON from the server with keys like: "
-        "userTranscript, Context, SuggestionCandidates, UpsellCandidates, MenuHint. "
-        "Context may include timeOfDay, climate, channel, tenant, branch, languageHint, lastIntent, lockedIntent, etc. "
-        "Use Context and the provided candidates to propose a helpful reply. "
-        "Use SuggestionCandidates and UpsellCandidates as the primary pools when proposing items, "
-        "suggestions, or upsells, or filling items[]. "
-        "Use ONLY the unified AllowedCandidates (merged shortlist) provided by the backend. "
-        "Never invent items outside this set, even if MenuHint.items exist. "
-        "Never invent items or IDs outside these provided sets. "
-        "Always respect channel, visibility, and availability implied by the candidates. "
-        "Your entire reply MUST be exactly one valid JSON object with this shape: "
-        "{"
-        "\"replyText\": string (<= 280 chars), "
-        "\"intent\": \"order\"|\"menu\"|\"suggestions\"|\"chitchat\", "
-        "\"language\": \"bn\"|\"en\", "
-        "\"items\": ["
-        " {\"name\": string, \"itemId\": string, \"quantity\": integer >=1}"
-        "], "
-        "\"suggestions\": ["
-        " {\"title\": string, \"subtitle\"?: string, \"itemId\"?: string, \"categoryId\"?: string, \"price\"?: number}"
-        "], "
-        "\"upsell\": ["
-        " {\"title\": string, \"subtitle\"?: string, \"itemId\"?: string, \"categoryId\"?: string, \"price\"?: number}"
-        "], "
-        "\"decision\": {"
-        " \"showSuggestionsModal\"?: boolean, "
-        " \"showUpsellTray\"?: boolean"
-        "}, "
-        "\"cartOps\"?: ["
-        " {"
-        " \"op\": \"add\"|\"set\"|\"delta\"|\"remove\", "
-        " \"itemId\"?: string, "
-        " \"name\"?: string, "
-        " \"quantity\"?: integer, "
-        " \"delta\"?: integer"
-        " }"
-        "], "
-        "\"clearCart\"?: boolean, "
-        "\"notes\"?: string, "
-        "\"voiceReplyText\"?: string "
-        "}. "
-        "For Bangla users (language=\"bn\"), UI item names in replyText MUST remain exactly as in candidates/menu "
-        "(English or mixed) so they match the real menu. "
-        "In addition, when language=\"bn\" you MUST ALWAYS provide \"voiceReplyText\" as a natural Bangla-script reading "
-        "of the FULL replyText, including phonetic Bangla spellings for any English menu item names. "
-        "If language=\"en\", you MAY omit voiceReplyText or set it equal to replyText. "
-        "Do NOT add items that are not in candidates/menu. "
-        "Only suggest clearing the cart when the user clearly asks to cancel everything. "
-        "If the user specifies a number or quantity in their request (in any language), "
-        "use that count to limit how many suggestions or items you include."
-        + concision_clause
-        + locked_intent_clause
-        + " "
-        + directive
-    )
+    return locked_intent_clause + " " + directive
 
 
 # -------------------- Intent inference (heuristic fallback) ----------------------
@@ -717,16 +753,16 @@ async def _call_openai_intent(messages: List[Dict[str, str]]) -> str:
     except Exception:
         pass
 
-    async with httpx.AsyncClient(timeout=INTENT_TIMEOUT_S) as client:
-        r = await client.post(
-            OPENAI_CHAT_URL,
-            headers=headers,
-            json=payload,
-        )
-        print("[brain:intent] HTTP", r.status_code)
-        print("[brain:intent] <<<", _safe_snip(r.text))
-        r.raise_for_status()
-        data = r.json()
+    r = await _http().post(
+        OPENAI_CHAT_URL,
+        headers=headers,
+        json=payload,
+        timeout=INTENT_TIMEOUT_S,
+    )
+    print("[brain:intent] HTTP", r.status_code)
+    print("[brain:intent] <<<", _safe_snip(r.text))
+    r.raise_for_status()
+    data = r.json()
 
     return (
         data.get("choices", [{}])[0]
@@ -910,11 +946,32 @@ def _build_menu_hint(
         return None
 
 
+def _build_candidates_line(
+    suggestion_candidates: Optional[List[Dict[str, Any]]],
+    upsell_candidates: Optional[List[Dict[str, Any]]],
+) -> Optional[Dict[str, str]]:
+    """
+    Candidate pools as their own system message. They only change with the
+    menu snapshot / cart, so keys are sorted to keep the bytes identical
+    across turns and the message sits in the cacheable prompt prefix.
+    """
+    payload: Dict[str, Any] = {}
+    if suggestion_candidates:
+        payload["SuggestionCandidates"] = suggestion_candidates
+    if upsell_candidates:
+        payload["UpsellCandidates"] = upsell_candidates
+    if not payload:
+        return None
+    try:
+        blob = json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+    except Exception:
+        return None
+    return {"role": "system", "content": f"[CANDIDATES]: {blob}"}
+
+
 def _build_user_input_payload(
     transcript: str,
     context: Optional[Dict[str, Any]],
-    suggestion_candidates: Optional[List[Dict[str, Any]]],
-    upsell_candidates: Optional[List[Dict[str, Any]]],
     menu_snapshot: Optional[Dict[str, Any]],
     locked_intent: Optional[str],
 ) -> str:
@@ -932,11 +989,6 @@ def _build_user_input_payload(
     if ctx_obj:
         payload["Context"] = ctx_obj
 
-    if suggestion_candidates:
-        payload["SuggestionCandidates"] = suggestion_candidates
-    if upsell_candidates:
-        payload["UpsellCandidates"] = upsell_candidates
-
     s = json.dumps(payload, ensure_ascii=False)
     if any(k in s.lower() for k in _DEBUG_KEYWORDS):
         print("[debug][user_input_payload]", _safe_snip(s, 400))
@@ -945,8 +997,97 @@ def _build_user_input_payload(
 
 # --------------------------- OpenAI Call (main brain) ---------------------------
 
+# async callback receiving replyText increments while the model streams
+ReplyDelta = Callable[[str], Awaitable[None]]
+
+# candidate pools may be passed as a list or as a zero-arg builder that is
+# only called once the reply actually needs them
+CandidateRows = List[Dict[str, Any]]
+CandidateArg = Optional[Union[CandidateRows, Callable[[], CandidateRows]]]
+
+
+def _resolve_candidates(c: CandidateArg) -> Optional[CandidateRows]:
+    if callable(c):
+        try:
+            return c()
+        except Exception as e:
+            print("[brain] candidate builder failed:", e)
+            return None
+    return c
+
+_REPLY_KEY_RX = re.compile(r'"replyText"\s*:\s*"')
+_JSON_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
 
-async def _call_openai(messages: List[Dict[str, str]]) -> str:
+class _ReplyTextStreamer:
+    """
+    Incrementally pulls the "replyText" string value out of a JSON object
+    arriving in arbitrary chunks; feed() returns the newly decoded text.
+    """
+
+    def __init__(self) -> None:
+        self.buf = ""
+        self.pos = -1  # index into buf of the next undecoded value char
+        self.done = False
+
+    def feed(self, chunk: str) -> str:
+        if self.done or not chunk:
+            return ""
+        self.buf += chunk
+        if self.pos < 0:
+            m = _REPLY_KEY_RX.search(self.buf)
+            if not m:
+                return ""
+            self.pos = m.end()
+
+        buf, i, n = self.buf, self.pos, len(self.buf)
+        out: List[str] = []
+        while i < n:
+            c = buf[i]
+            if c == '"':
+                self.done = True
+                break
+            if c != "\\":
+                out.append(c)
+                i += 1
+                continue
+            # escape: wait for the rest of it to arrive
+            if i + 1 >= n:
+                break
+            e = buf[i + 1]
+            if e == "u":
+                if i + 6 > n:
+                    break
+                try:
+                    cp = int(buf[i + 2 : i + 6], 16)
+                except ValueError:
+                    cp = -1
+                if 0xD800 <= cp < 0xDC00:
+                    # surrogate pair (ensure_ascii output): need both halves
+                    if i + 12 > n:
+                        break
+                    try:
+                        lo = int(buf[i + 8 : i + 12], 16)
+                    except ValueError:
+                        lo = -1
+                    if buf[i + 6 : i + 8] == "\\u" and 0xDC00 <= lo < 0xE000:
+                        out.append(chr(0x10000 + ((cp - 0xD800) << 10) + (lo - 0xDC00)))
+                        i += 12
+                        continue
+                if cp >= 0:
+                    out.append(chr(cp))
+                i += 6
+                continue
+            out.append(_JSON_ESCAPES.get(e, e))
+            i += 2
+        self.pos = i
+        return "".join(out)
+
+
+async def _call_openai(
+    messages: List[Dict[str, str]],
+    on_delta: Optional[ReplyDelta] = None,
+) -> str:
     if not OPENAI_API_KEY:
         raise RuntimeError("OPENAI_API_KEY is not set")
 
@@ -970,16 +1111,30 @@ async def _call_openai(messages: List[Dict[str, str]]) -> str:
     except Exception:
         pass
 
-    async with httpx.AsyncClient(timeout=BRAIN_TIMEOUT_S) as client:
-        r = await client.post(
-            OPENAI_CHAT_URL,
-            headers=headers,
-            json=payload,
+    if on_delta is not None:
+        content = await _call_openai_stream(headers, payload, on_delta)
+        if any(k in content.lower() for k in _DEBUG_KEYWORDS):
+            print("[debug][model_raw_content]", _safe_snip(content, 800))
+        return content
+
+    r = await _http().post(
+        OPENAI_CHAT_URL,
+        headers=headers,
+        json=payload,
+        timeout=BRAIN_TIMEOUT_S,
+    )
+    print("[brain] HTTP", r.status_code)
+    print("[brain] <<<", _safe_snip(r.text))
+    r.raise_for_status()
+    data = r.json()
+
+    # prompt-cache observability (OpenAI: usage.prompt_tokens_details)
+    usage = data.get("usage") or {}
+    cached = (usage.get("prompt_tokens_details") or {}).get("cached_tokens")
+    if cached is not None:
+        print(
+            f"[brain] prompt_tokens={usage.get('prompt_tokens')} cached_tokens={cached}"
         )
-        print("[brain] HTTP", r.status_code)
-        print("[brain] <<<", _safe_snip(r.text))
-        r.raise_for_status()
-        data = r.json()
 
     content = (
         data.get("choices", [{}])[0]
@@ -997,6 +1152,69 @@ async def _call_openai(messages: List[Dict[str, str]]) -> str:
     return content
 
 
+async def _call_openai_stream(
+    headers: Dict[str, str],
+    payload: Dict[str, Any],
+    on_delta: ReplyDelta,
+) -> str:
+    """
+    Same request with stream=True: forwards replyText increments to
+    on_delta as they arrive and returns the full content at the end.
+    """
+    payload = {**payload, "stream": True, "stream_options": {"include_usage": True}}
+    streamer = _ReplyTextStreamer()
+    parts: List[str] = []
+    usage: Dict[str, Any] = {}
+
+    async with _http().stream(
+        "POST",
+        OPENAI_CHAT_URL,
+        headers=headers,
+        json=payload,
+        timeout=BRAIN_TIMEOUT_S,
+    ) as r:
+        print("[brain] HTTP", r.status_code, "(stream)")
+        if r.status_code >= 400:
+            await r.aread()
+            print("[brain] <<<", _safe_snip(r.text))
+            r.raise_for_status()
+
+        async for line in r.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                break
+            try:
+                event = json.loads(data)
+            except ValueError:
+                continue
+            if event.get("usage"):
+                usage = event["usage"]
+            for choice in event.get("choices") or []:
+                piece = (choice.get("delta") or {}).get("content")
+                if not piece:
+                    continue
+                parts.append(piece)
+                text = streamer.feed(piece)
+                if text:
+                    try:
+                        await on_delta(text)
+                    except Exception as e:
+                        # a dead socket must not abort the reply itself
+                        print("[brain] reply delta push failed:", e)
+
+    content = "".join(parts).strip()
+    print("[brain] <<<", _safe_snip(content))
+
+    cached = (usage.get("prompt_tokens_details") or {}).get("cached_tokens")
+    if cached is not None:
+        print(
+            f"[brain] prompt_tokens={usage.get('prompt_tokens')} cached_tokens={cached}"
+        )
+    return content
+
+
 # ------------------------ JSON Parse Helpers ------------------------
 
 _JSON_FIRST_OBJECT = re.compile(r"\{.*\}", re.DOTALL)
@@ -2439,9 +2657,17 @@ async def generate_reply(
     history: Optional[List[Dict[str, str]]] = None,
     dialog_state: Optional[Dict[str, Any]] = None,
     context: Optional[Dict[str, Any]] = None,
-    suggestion_candidates: Optional[List[Dict[str, Any]]] = None,
-    upsell_candidates: Optional[List[Dict[str, Any]]] = None,
+    suggestion_candidates: CandidateArg = None,
+    upsell_candidates: CandidateArg = None,
+    on_reply_delta: Optional[ReplyDelta] = None,
 ) -> Dict[str, Any]:
+    """
+    suggestion_candidates / upsell_candidates: lists, or zero-arg callables
+    building them; callables are skipped on the early-return paths.
+    on_reply_delta: if given, the model is called in streaming mode and
+    receives replyText increments as they arrive (before post-processing;
+    the returned replyText stays authoritative).
+    """
     transcript = _clamp(transcript or "", 2000)
 
     ctx = context or {}
@@ -2561,6 +2787,9 @@ async def generate_reply(
         dialog_state=dialog_state,
     )
 
+    suggestion_candidates = _resolve_candidates(suggestion_candidates)
+    upsell_candidates = _resolve_candidates(upsell_candidates)
+
     # Unified candidate pool: suggestions + upsell + full menu
     unified_candidates: List[Dict[str, Any]] = (suggestion_candidates or []) + (
         upsell_candidates or []
@@ -2579,43 +2808,54 @@ async def generate_reply(
         [],
     )
 
-    # System message
+    # Prompt layout, most stable first, so the provider's prompt cache can
+    # reuse the longest prefix across turns:
+    #   static system -> candidates (per snapshot/cart) -> history (append-only)
+    #   -> per-turn directives, DialogState, INPUT.
+    # Keep new per-turn content out of the prefix.
     messages: List[Dict[str, str]] = [
+        {"role": "system", "content": _SYSTEM_BASE}
+    ]
+
+    candidates_line = _build_candidates_line(suggestion_candidates, upsell_candidates)
+    if candidates_line:
+        messages.append(candidates_line)
+
+    # Recent history
+    if history:
+        for t in history[-8:]:
+            r = t.get("role")
+            c = (t.get("content") or "").strip()
+            if r in ("user", "assistant") and c:
+                messages.append({"role": r, "content": c})
+
+    # Per-turn directives
+    messages.append(
         {
             "role": "system",
-            "content": _build_system_with_lang(
+            "content": _build_turn_directives(
                 lang_hint,
                 locked_intent,
             ),
         }
-    ]
+    )
 
     # Optional DialogState
     state_line = _build_state_line(dialog_state)
     if state_line:
         messages.append(state_line)
 
-    # Recent history
-    if history:
-        for t in history[-8:]:
-            r = t.get("role")
-            c = (t.get("content") or "").strip()
-            if r in ("user", "assistant") and c:
-                messages.append({"role": r, "content": c})
-
     # INPUT payload
     user_payload = _build_user_input_payload(
         transcript=transcript,
         context=context,
-        suggestion_candidates=suggestion_candidates,
-        upsell_candidates=upsell_candidates,
         menu_snapshot=menu_snapshot,
         locked_intent=locked_intent,
     )
     messages.append({"role": "user", "content": f"[INPUT]: {user_payload}"})
 
     try:
-        raw = await _call_openai(messages)
+        raw = await _call_openai(messages, on_delta=on_reply_delta)
         obj = _parse_model_json(raw)
 
         if any(_debug_has_kw(json.dumps(obj, ensure_ascii=False)) for _ in [None]):
@@ -0,0 +1,38 @@
+# services/ai-waiter-service/menu_tokens.py
+import re
+from typing import List
+
+_WORD_RX = re.compile(r"[a-z\u0980-\u09FF]+")
+# non-overlapping word pairs plus a trailing single word ("i want burger" →
+# ["i want", "burger"]); the DB fallback's original token set
+_PHRASE_RX = re.compile(r"[a-z\u0980-\u09FF]+(?:\s+[a-z\u0980-\u09FF]+)?")
+
+# shorter tokens are substrings of nearly every menu name
+FALLBACK_MIN_TOKEN_LEN = 3
+
+# request filler that would match item names as substrings without naming one
+_STOPWORDS = frozenset(
+    "a an and any are can could do for get give have i is it like me my "
+    "need of one please some something the to two want we with would you".split()
+    + "আমি আমাকে আমার চাই দিন দাও একটা একটি দুইটা কি আছে".split()
+)
+
+
+def tokenize_lower(s: str) -> List[str]:
+    """Lowercased words (Latin + Bangla)."""
+    return _WORD_RX.findall((s or "").lower())
+
+
+def fallback_tokens(s: str, limit: int = 6) -> List[str]:
+    """
+    Phrases for the DB substring fallback (case-insensitive $regex).
+
+    The original pair tokens first, then content words (not filler, at
+    least FALLBACK_MIN_TOKEN_LEN long) so a one-word item named mid-sentence
+    ("one burger please") is still found. Deduped in order.
+    """
+    low = (s or "").lower()
+    cands = _PHRASE_RX.findall(low)
+    cands += [w for w in _WORD_RX.findall(low) if w not in _STOPWORDS]
+    out = [t for t in dict.fromkeys(cands) if len(t) >= FALLBACK_MIN_TOKEN_LEN]
+    return out[:limit]
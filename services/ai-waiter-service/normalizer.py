@@ -1,11 +1,14 @@
 import json, re, unicodedata
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, FrozenSet, List, Tuple, Optional
 from rapidfuzz import process, fuzz
 
 # ---------- load exact pairs (once) ----------
 PAIRS_PATH = Path(__file__).parent.parent.parent / "fine_tuning" / "asr_pairs.jsonl"
 EXACT_MAP: Dict[str, str] = {}
+# EXACT_MAP pairs, longest noisy phrase first (built once after load)
+EXACT_PAIRS: List[Tuple[str, str]] = []
 
 def _load_pairs():
     if PAIRS_PATH.exists():
@@ -18,19 +21,23 @@ def _load_pairs():
                 EXACT_MAP[obj["noisy"]] = obj["clean"]
 
 _load_pairs()
+EXACT_PAIRS = sorted(EXACT_MAP.items(), key=lambda kv: -len(kv[0]))
 
 # ---------- basic cleanup ----------
 BN_DIGITS = "০১২৩৪৫৬৭৮৯"
+# one C-level pass: drop ZWNJ/ZWJ, Bengali → ASCII digits, unify dashes
+# (none of these take part in NFC composition, so order vs NFC doesn't matter)
+_CLEAN_TABLE = str.maketrans(
+    {"\u200c": None, "\u200d": None, "–": "-", "—": "-",
+     **{d: str(i) for i, d in enumerate(BN_DIGITS)}}
+)
+_WS_RX = re.compile(r"\s+")
+
 def _basic_clean(s: str) -> str:
-    # strip ZWJ/ZWNJ, normalize unicode, collapse spaces, normalize digits
-    s = s.replace("\u200c","").replace("\u200d","")
+    # strip ZWJ/ZWNJ, normalize digits/dashes, normalize unicode, collapse spaces
+    s = s.translate(_CLEAN_TABLE)
     s = unicodedata.normalize("NFC", s)
-    s = re.sub(r"\s+", " ", s).strip()
-    # Bengali → ASCII digits
-    s = "".join(str(BN_DIGITS.index(ch)) if ch in BN_DIGITS else ch for ch in s)
-    # unify punctuation variants
-    s = s.replace("–","-").replace("—","-").replace("–","-")
-    return s
+    return _WS_RX.sub(" ", s).strip()
 
 # ---------- simple Bangla phonetic key ----------
 # Goal: map visually different spellings to same sound “bucket”.
@@ -59,17 +66,43 @@ PHONETIC_MAP = {
     "q":"k","x":"ks","c":"k","y":"y","j":"j"
 }
 
+# per-character map as a translate table (values are already lowercase, so
+# lowering afterwards only affects unmapped characters, as before)
+_PHONETIC_TABLE = str.maketrans({k: v for k, v in PHONETIC_MAP.items() if len(k) == 1})
+_REPEAT_RX = re.compile(r"(.)\1+")
+_NON_ALNUM_RX = re.compile(r"[^a-z0-9]")
+
+@lru_cache(maxsize=4096)
 def phonetic_key(token: str) -> str:
-    out = []
-    for ch in token:
-        out.append(PHONETIC_MAP.get(ch, ch.lower()))
-    key = "".join(out)
+    key = token.translate(_PHONETIC_TABLE).lower()
     # collapse repeats (e.g., 'kk' -> 'k')
-    key = re.sub(r"(.)\1+", r"\1", key)
+    key = _REPEAT_RX.sub(r"\1", key)
     # strip non-letters/digits
-    key = re.sub(r"[^a-z0-9]", "", key)
+    key = _NON_ALNUM_RX.sub("", key)
     return key
 
+def _token_sorted(s: str) -> str:
+    # the preprocessing fuzz.token_sort_ratio applies to both sides
+    return " ".join(sorted(s.split()))
+
+@lru_cache(maxsize=64)
+def _vocab_index(
+    vocab: Tuple[str, ...],
+) -> Tuple[FrozenSet[str], Dict[str, List[str]], Dict[str, str]]:
+    """
+    (vocab_set, phonetic buckets, vocab -> token-sorted form) for a vocab;
+    cached so a menu snapshot's vocab is indexed once instead of on every
+    utterance. With the sorted forms precomputed, token_sort_ratio reduces
+    to fuzz.ratio and choices aren't re-split/sorted per token.
+    """
+    vocab_set = frozenset(vocab)
+    bucket: Dict[str, List[str]] = {}
+    sorted_forms: Dict[str, str] = {}
+    for v in vocab_set:
+        bucket.setdefault(phonetic_key(v), []).append(v)
+        sorted_forms[v] = _token_sorted(v)
+    return vocab_set, bucket, sorted_forms
+
 # ---------- main normalize ----------
 def normalize_text(
     text: str,
@@ -87,9 +120,8 @@ def normalize_text(
     s = _basic_clean(text0)
 
     # phrase-level exact replacements first (longest first to catch multi-words)
-    if EXACT_MAP:
-        for noisy, clean in sorted(EXACT_MAP.items(), key=lambda kv: -len(kv[0])):
-            s = s.replace(noisy, clean)
+    for noisy, clean in EXACT_PAIRS:
+        s = s.replace(noisy, clean)
 
     tokens = s.split(" ")
     changed: List[Tuple[str, str, float]] = []
@@ -97,12 +129,8 @@ def normalize_text(
     if not vocab:
         return " ".join(tokens), changed
 
-    # Prepare lookup sets
-    vocab_set = set(vocab)
-    # Precompute phonetic buckets
-    bucket = {}
-    for v in vocab_set:
-        bucket.setdefault(phonetic_key(v), []).append(v)
+    # Lookup set + phonetic buckets (cached per vocab)
+    vocab_set, bucket, sorted_forms = _vocab_index(tuple(vocab))
 
     out_tokens = []
     for tok in tokens:
@@ -116,20 +144,22 @@ def normalize_text(
 
         best = None
         best_score = -1.0
+        tok_sorted = _token_sorted(tok)
 
-        # Try phonetic candidates first with partial_ratio to be robust
+        # Try phonetic candidates first (token_sort_ratio on presorted forms)
         for c in cand:
-            sc = fuzz.token_sort_ratio(tok, c) / 100.0
+            sc = fuzz.ratio(tok_sorted, sorted_forms[c]) / 100.0
             if sc > best_score:
                 best, best_score = c, sc
 
         # If none or weak, run fuzzy over full vocab (bounded by top_n)
         if not best or best_score < fuzzy_threshold:
+            # dict choices: scored on the sorted form, returns the vocab key
             m = process.extractOne(
-                tok, vocab_set, scorer=fuzz.token_sort_ratio, score_cutoff=int(fuzzy_threshold*100)
+                tok_sorted, sorted_forms, scorer=fuzz.ratio, score_cutoff=int(fuzzy_threshold*100)
             )
             if m:
-                cand_word, sc, _ = m
+                _, sc, cand_word = m
                 best, best_score = cand_word, sc/100.0
 
         if best and best_score >= fuzzy_threshold:
@@ -0,0 +1,68 @@
+# services/ai-waiter-service/pcm_ring.py
+import numpy as np
+
+
+class PcmRing:
+    """
+    Fixed-capacity ring buffer of mono int16 PCM.
+
+    Keeps only the newest `max_samples` samples; appends write into
+    preallocated memory instead of growing/re-slicing a bytearray.
+    """
+
+    def __init__(self, max_samples: int):
+        self.cap = max(1, int(max_samples))
+        self.buf = np.zeros(self.cap, dtype=np.int16)
+        self.w = 0  # next write index
+        self.n = 0  # valid samples
+
+    def __len__(self) -> int:
+        return self.n
+
+    @property
+    def nbytes(self) -> int:
+        return self.n * 2
+
+    def clear(self) -> None:
+        self.w = 0
+        self.n = 0
+
+    def write(self, chunk: bytes) -> None:
+        # drop a trailing odd byte rather than failing the whole frame
+        x = np.frombuffer(chunk, dtype=np.int16, count=len(chunk) // 2)
+        k = x.size
+        if k == 0:
+            return
+
+        cap = self.cap
+        if k >= cap:
+            self.buf[:] = x[-cap:]
+            self.w = 0
+            self.n = cap
+            return
+
+        end = self.w + k
+        if end <= cap:
+            self.buf[self.w:end] = x
+        else:
+            first = cap - self.w
+            self.buf[self.w:] = x[:first]
+            self.buf[: k - first] = x[first:]
+        self.w = end % cap
+        self.n = min(cap, self.n + k)
+
+    def view(self) -> memoryview:
+        """
+        Byte view of the buffered samples, oldest first. Zero-copy until the
+        ring has wrapped (one copy after). Only valid until the next write.
+        """
+        if self.n < self.cap:
+            return memoryview(self.buf[: self.n]).cast("B")
+        return memoryview(self.tobytes())
+
+    def tobytes(self) -> bytes:
+        """Contiguous copy of the buffered samples, oldest first."""
+        if self.n < self.cap:
+            # not wrapped yet: data lives in [0, n)
+            return self.buf[: self.n].tobytes()
+        return np.concatenate((self.buf[self.w:], self.buf[: self.w])).tobytes()
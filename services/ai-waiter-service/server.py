@@ -1,38 +1,60 @@
-import asyncio, json, os, time, re, io, wave
+import asyncio, math, os, time, re, io, struct, threading
+
+# Reduce thread thrash on CPU. BLAS/OpenMP read these once at load, so they
+# must be set before numpy / CTranslate2 (via stt) are imported.
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+os.environ.setdefault("MKL_NUM_THREADS", "1")
+os.environ.setdefault("OPENBLAS_NUM_THREADS", "1")
+os.environ.setdefault("NUMEXPR_NUM_THREADS", "1")
+
+# print() is the service's logger; route stdout through a queue drained by a
+# background thread so a blocked log pipe can't stall the event loop.
+# Installed before the heavy imports so model-load logs go through it too.
+if os.environ.get("STDOUT_QUEUE", "1") != "0":
+    import stdout_queue
+
+    stdout_queue.install(int(os.environ.get("STDOUT_QUEUE_MAX", "10000")))
+
+import orjson
+import msgpack
 from datetime import datetime
 from zoneinfo import ZoneInfo  # ✅ stdlib tz support
 import numpy as np
+import soundfile as sf
 import websockets
 from websockets.server import WebSocketServerProtocol
-from faster_whisper import WhisperModel
-from pymongo import MongoClient
+from pymongo import MongoClient, WriteConcern
+from motor.motor_asyncio import AsyncIOMotorClient
 from vad import Segmenter
+from pcm_ring import PcmRing
 import httpx
-from typing import Dict, Any, List, Tuple, Optional, Deque
+from typing import Dict, Any, List, Tuple, Optional, Deque, Set, Union, Callable
+from functools import partial
 from bson import ObjectId  # ✅
-from collections import defaultdict, deque
+from collections import OrderedDict, defaultdict, deque
 from aiohttp import web  # ✅ HTTP server for cart API
 
 # ✅ rolling context/state helpers (same folder)
 from session_ctx import (
     get_history,
     push_user,
-    push_assistant,
     get_state,
-    update_state,
+    commit_turn,
 )
 
 # ✅ In-process brain (OpenAI) call
-from brain import generate_reply
+from brain import generate_reply, close_http as close_brain_http
 
 # ✅ Normalizer (exact pairs + phonetic + fuzzy)
 from normalizer import normalize_text
 
-# ✅ Local speech-to-text (PCM → text)
-from stt import stt_np_float32
+# ✅ Local speech-to-text (PCM → text); the Whisper model is loaded, quantized
+#    for the detected device, and warmed up once inside stt.py
+from stt import stt_async, ensure_en_model, STT_POOL
 
 # ✅ Cart persistence helper
 from cart_store import save_cart, load_cart
+from menu_tokens import fallback_tokens
 
 # ---------- Config ----------
 
@@ -62,9 +84,20 @@ _CLIENT = MongoClient(MONGO_URI)
 DB = _CLIENT[TRANS_DB_NAME]
 COLL = DB.transcripts
 
+# async transcripts handle for the writer (bound to the loop in main())
+ACOLL = None
+
+# Transcripts are TTL'd telemetry: default to unacknowledged (w=0) batch inserts
+TRANSCRIPT_WRITE_W = int(os.environ.get("TRANSCRIPT_WRITE_W", "0"))
+
 # menu collection handle
 ITEMS = _CLIENT[MENU_DB_NAME][MENU_COLL]
 
+# tenants (resolve slug/subdomain/code/name → _id)
+TENANTS = _CLIENT[MENU_DB_NAME]["tenants"]
+# also search the transcripts DB's tenants collection (legacy deployments)
+TENANT_LOOKUP_TRANS_DB = os.environ.get("TENANT_LOOKUP_TRANS_DB", "0") == "1"
+
 # Weather API (tiny helper; safe no-op on failure)
 WEATHER_API_BASE = os.environ.get(
     "WEATHER_API_BASE", "https://api.open-meteo.com/v1/forecast"
@@ -93,9 +126,23 @@ try:
 except Exception as e:
     print("[ai-waiter-service] TTL index create failed:", str(e))
 
-WHISPER_MODEL = os.environ.get("WHISPER_MODEL", "tiny")
-DEVICE = os.environ.get("WHISPER_DEVICE", "cpu")
-COMPUTE_TYPE = os.environ.get("WHISPER_COMPUTE_TYPE", "int8")
+# Index every tenant lookup field so the $or in resolve_tenant_id stays indexed
+# (subdomain already has a unique index owned by auth-service)
+for _field in ("slug", "code", "name"):
+    try:
+        TENANTS.create_index(_field, sparse=True, name=f"ai_waiter_{_field}")
+    except Exception as e:
+        print(f"[ai-waiter-service] tenants.{_field} index create failed:", str(e))
+
+# Menu snapshot / DB fallback filter on exactly these (build_menu_query)
+try:
+    ITEMS.create_index(
+        [("tenantId", 1), ("status", 1), ("hidden", 1)],
+        name="ai_waiter_tenant_status_hidden",
+    )
+except Exception as e:
+    print("[ai-waiter-service] menu items index create failed:", str(e))
+
 WHISPER_LANG = os.environ.get("WHISPER_LANG", "bn")
 
 # Groq (final transcription)
@@ -103,28 +150,125 @@ GROQ_API_KEY = os.environ.get("GROQ_API_KEY")
 GROQ_MODEL = os.environ.get("GROQ_MODEL", "whisper-large-v3")
 GROQ_BASE = os.environ.get("GROQ_BASE", "https://api.groq.com")
 GROQ_TIMEOUT_MS = int(os.environ.get("GROQ_TIMEOUT_MS", "3000"))  # 3s
+# Re-ask Groq in the other language when the final comes back in the wrong
+# script (costs a second round-trip); "0" accepts or rejects the first answer
+GROQ_LANG_RETRY = os.environ.get("GROQ_LANG_RETRY", "1") != "0"
+# Upload container for Groq: "flac" (≈half the bytes of WAV) or "wav"
+GROQ_UPLOAD_FORMAT = os.environ.get("GROQ_UPLOAD_FORMAT", "flac").strip().lower()
+
+# Idle Groq connections are kept this long (httpx default is 5s, shorter
+# than a typical utterance, so the final would usually reconnect)
+GROQ_KEEPALIVE_S = float(os.environ.get("GROQ_KEEPALIVE_S", "60"))
+
+# Shared Groq client: keeps TLS connections alive across finals (created in main())
+GROQ_CLIENT: Optional[httpx.AsyncClient] = None
+_groq_warmed_at = 0.0
+
+
+def make_groq_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=True,
+        timeout=GROQ_TIMEOUT_MS / 1000,
+        limits=httpx.Limits(
+            max_keepalive_connections=16,
+            max_connections=32,
+            keepalive_expiry=GROQ_KEEPALIVE_S,
+        ),
+    )
+
+
+async def warm_groq() -> None:
+    """
+    Open (or refresh) a pooled Groq connection with a cheap authenticated
+    GET, so the final's upload doesn't pay DNS + TLS setup. Throttled to
+    once per half keepalive window; failures are ignored.
+    """
+    global _groq_warmed_at
+    if not GROQ_API_KEY or GROQ_CLIENT is None:
+        return
+    now = time.monotonic()
+    if now - _groq_warmed_at < GROQ_KEEPALIVE_S / 2:
+        return
+    _groq_warmed_at = now
+    try:
+        await GROQ_CLIENT.get(
+            GROQ_BASE.rstrip("/") + "/openai/v1/models",
+            headers={"Authorization": f"Bearer {GROQ_API_KEY}"},
+        )
+    except Exception as e:
+        print("[ai-waiter-service] Groq warmup failed:", e)
+
+
+# Shared client for the other outbound lookups (weather); also created in main()
+HTTP_CLIENT: Optional[httpx.AsyncClient] = None
 
 # Silence → finalize threshold (ms)
 IDLE_FINALIZE_MS = int(os.environ.get("IDLE_FINALIZE_MS", "1200"))
 
+# Partials arriving within this window are coalesced (latest wins)
+PARTIAL_COALESCE_MS = int(os.environ.get("PARTIAL_COALESCE_MS", "40"))
+
+# While the STT worker is busy, pending chunks are merged up to this much
+# audio; beyond it the oldest audio is dropped (newest always kept)
+CHUNK_COALESCE_MS = int(os.environ.get("CHUNK_COALESCE_MS", "4000"))
+
+# Auto-language sessions keep Whisper's lang-ID on until this much decoded
+# audio agrees on one language; a short/noisy first chunk can't lock it
+LANG_LOCK_MIN_MS = int(os.environ.get("LANG_LOCK_MIN_MS", "3000"))
+
 # Normalizer knobs
 FUZZY_THRESHOLD = float(os.environ.get("NORMALIZER_FUZZY_THRESHOLD", "0.83"))
 MENU_SNAPSHOT_MAX = int(os.environ.get("MENU_SNAPSHOT_MAX", "120"))  # max items sent to brain per turn
 VOCAB_MAX = int(os.environ.get("NORMALIZER_VOCAB_MAX", "200"))
 INCLUDE_ALIASES = os.environ.get("NORMALIZER_INCLUDE_ALIASES", "1") == "1"
 
-# Reduce thread thrash on CPU
-os.environ.setdefault("OMP_NUM_THREADS", "1")
-os.environ.setdefault("MKL_NUM_THREADS", "1")
-os.environ.setdefault("OPENBLAS_NUM_THREADS", "1")
-os.environ.setdefault("NUMEXPR_NUM_THREADS", "1")
+# In-process caches for the per-turn Mongo reads (seconds)
+MENU_CACHE_TTL_S = float(os.environ.get("MENU_CACHE_TTL_S", "10"))
+TENANT_CACHE_TTL_S = float(os.environ.get("TENANT_CACHE_TTL_S", "300"))
+# unresolved hints are remembered only briefly (a tenant may be created)
+TENANT_MISS_TTL_S = float(os.environ.get("TENANT_MISS_TTL_S", "30"))
+# same LRU bound as the session store (session_ctx.MAX_SESSIONS)
+TENANT_CACHE_MAX = int(os.environ.get("TENANT_CACHE_MAX", "10000"))
+# both caches are keyed by client-supplied tenant hints: LRU-capped, and an
+# expired snapshot is served (while refreshing) for at most MENU_CACHE_STALE_S
+MENU_CACHE_MAX = int(os.environ.get("MENU_CACHE_MAX", "256"))
+MENU_CACHE_STALE_S = float(os.environ.get("MENU_CACHE_STALE_S", "60"))
+
+# Background DB writer (batch). Bounded so a slow/down Mongo can't grow the
+# backlog without limit; overflow is dropped and counted.
+TRANSCRIPT_QUEUE_MAX = int(os.environ.get("TRANSCRIPT_QUEUE_MAX", "10000"))
+writer_q: asyncio.Queue = asyncio.Queue(maxsize=TRANSCRIPT_QUEUE_MAX)
+_dropped_transcripts = 0
+
+
+def enqueue_transcript(doc: Dict[str, Any]) -> bool:
+    """Hand a transcript to the writer without blocking the turn."""
+    global _dropped_transcripts
+    try:
+        writer_q.put_nowait(doc)
+        return True
+    except asyncio.QueueFull:
+        _dropped_transcripts += 1
+        # log the first drop and then every 100th, not every turn
+        if _dropped_transcripts % 100 == 1:
+            print(
+                f"[ai-waiter-service] transcript queue full, "
+                f"dropped={_dropped_transcripts}"
+            )
+        return False
 
-# Load model once (warm)
-print(f"[ai-waiter-service] Loading Faster-Whisper model={WHISPER_MODEL} device={DEVICE} compute={COMPUTE_TYPE}")
-model = WhisperModel(WHISPER_MODEL, device=DEVICE, compute_type=COMPUTE_TYPE)
 
-# Background DB writer (batch)
-writer_q: asyncio.Queue = asyncio.Queue()
+def _compact_transcript(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Drop fields that carry nothing: empty segments/norm_changes, None
+    values, and text_norm when normalization didn't change the text.
+    Keys read downstream (text, session, engine, ts, status, ai) are kept.
+    """
+    if doc.get("text_norm") == doc.get("text"):
+        doc.pop("text_norm", None)
+    for k in [k for k, v in doc.items() if v is None or (isinstance(v, list) and not v)]:
+        del doc[k]
+    return doc
 
 
 async def writer():
@@ -133,7 +277,7 @@ async def writer():
     """
     import time as _time
 
-    FLUSH_N = int(os.environ.get("TRANSCRIPT_FLUSH_N", "1"))
+    FLUSH_N = int(os.environ.get("TRANSCRIPT_FLUSH_N", "50"))
     FLUSH_MS = int(os.environ.get("TRANSCRIPT_FLUSH_MS", "1500"))
 
     buf = []
@@ -143,20 +287,24 @@ async def writer():
         nonlocal buf, last_flush
         if not buf:
             return
+        batch, buf = buf, []
         try:
-            COLL.insert_many(buf, ordered=False)
-            print(f"[ai-waiter-service] inserted batch={len(buf)}")
+            await ACOLL.insert_many(batch, ordered=False)
+            print(f"[ai-waiter-service] inserted batch={len(batch)}")
         except Exception as e:
             print("[ai-waiter-service] insert_many error:", str(e))
-        buf.clear()
         last_flush = _time.monotonic()
 
     while True:
+        # empty buffer: sleep until the next item; otherwise wake exactly
+        # when the oldest buffered item reaches FLUSH_MS
+        timeout = None
+        if buf:
+            timeout = max(0.0, FLUSH_MS / 1000 - (_time.monotonic() - last_flush))
         try:
-            item = await asyncio.wait_for(writer_q.get(), timeout=FLUSH_MS / 1000)
+            item = await asyncio.wait_for(writer_q.get(), timeout=timeout)
         except asyncio.TimeoutError:
-            if (_time.monotonic() - last_flush) * 1000 >= FLUSH_MS:
-                await do_flush()
+            await do_flush()
             continue
 
         if item is None:
@@ -164,12 +312,16 @@ async def writer():
             print("[ai-waiter-service] writer shutdown complete")
             break
 
-        buf.append(item)
+        if not buf:
+            # age is measured from the first item of a batch
+            last_flush = _time.monotonic()
+        buf.append(_compact_transcript(item))
         if len(buf) >= FLUSH_N or (_time.monotonic() - last_flush) * 1000 >= FLUSH_MS:
             await do_flush()
 
 
 WRITER_TASK = None
+WS_SERVER = None  # set in main(); shutdown() closes it first
 
 # ---------- NEW: Minimal HTTP API for cart persistence ----------
 
@@ -181,6 +333,16 @@ def _cart_cors_headers() -> Dict[str, str]:
     }
 
 
+def _cart_json(obj: Dict[str, Any], status: int = 200) -> web.Response:
+    # orjson emits bytes directly: no json.dumps + str.encode round trip
+    return web.Response(
+        body=orjson.dumps(obj),
+        status=status,
+        content_type="application/json",
+        headers=_cart_cors_headers(),
+    )
+
+
 async def handle_cart_load(request: web.Request) -> web.StreamResponse:
     try:
         tenant = request.query.get("tenant") or "unknown"
@@ -190,37 +352,23 @@ async def handle_cart_load(request: web.Request) -> web.StreamResponse:
             or "anon"
         )
         items = load_cart(tenant, sid)
-        return web.json_response(
-            {"ok": True, "items": items},
-            headers=_cart_cors_headers(),
-        )
+        return _cart_json({"ok": True, "items": items})
     except Exception as e:
         print("[ai-waiter-service] ❌ cart_load error:", e)
-        return web.json_response(
-            {"ok": False, "error": str(e)},
-            status=500,
-            headers=_cart_cors_headers(),
-        )
+        return _cart_json({"ok": False, "error": str(e)}, status=500)
 
 
 async def handle_cart_save(request: web.Request) -> web.StreamResponse:
     try:
-        data = await request.json()
+        data = await request.json(loads=orjson.loads)
         tenant = data.get("tenant") or "unknown"
         sid = data.get("sessionId") or "anon"
         items = data.get("items") or []
         save_cart(tenant, sid, items)
-        return web.json_response(
-            {"ok": True},
-            headers=_cart_cors_headers(),
-        )
+        return _cart_json({"ok": True})
     except Exception as e:
         print("[ai-waiter-service] ❌ cart_save error:", e)
-        return web.json_response(
-            {"ok": False, "error": str(e)},
-            status=500,
-            headers=_cart_cors_headers(),
-        )
+        return _cart_json({"ok": False, "error": str(e)}, status=500)
 
 
 async def handle_cart_options(request: web.Request) -> web.StreamResponse:
@@ -251,22 +399,96 @@ async def start_http_server():
 
 # ---------- Helpers ----------
 
+def ws_json(obj: Dict[str, Any]) -> str:
+    """Serialize a WS frame with orjson; sent as text so clients still get strings."""
+    return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+def ws_msgpack(obj: Dict[str, Any]) -> bytes:
+    """Binary msgpack frame, for clients that opt in with hello {"enc": "msgpack"}."""
+    return msgpack.packb(obj, use_bin_type=True)
+
+
+# most finals need no normalizer fix (exact snapshot hit): share one payload
+_NO_NORM_CHANGES: Dict[str, Any] = {"changed": []}
+
+
+def normalizer_meta(changes: List[Tuple[str, str, float]]) -> Dict[str, Any]:
+    """meta.normalizer for ai_reply frames (read-only; only serialized)."""
+    if not changes:
+        return _NO_NORM_CHANGES
+    return {"changed": [{"from": a, "to": b, "score": s} for (a, b, s) in changes]}
+
+
+# Constant frames, serialized once (str → sent as text frames)
+ACK_FRAME = ws_json({"t": "ack"})
+PENDING_FRAME = ws_json({"t": "ai_reply_pending"})
+ERROR_FRAME = ws_json({"t": "ai_reply_error", "message": "AI unavailable"})
+
+
 _LATIN = re.compile(r"[A-Za-z]")
 _BENGALI = re.compile(r"[\u0980-\u09FF]")
+_ANY_SCRIPT = re.compile(r"[A-Za-z\u0980-\u09FF]")
 
-BANGLA_PROMPT = "আসসালামু আলাইকুম, আমি খাবার অর্ডার করতে চাই।"
+
+def scan_scripts(text: Optional[str]) -> Tuple[bool, bool]:
+    """
+    Classify Bengali/Latin presence in one pass over the text.
+    The first script hit decides which class to look for next, and that
+    second search resumes from the hit instead of rescanning.
+    Returns (has_bn, has_en).
+    """
+    if not text:
+        return False, False
+    m = _ANY_SCRIPT.search(text)
+    if not m:
+        return False, False
+    if m.group() < "\u0980":
+        return _BENGALI.search(text, m.end()) is not None, True
+    return True, _LATIN.search(text, m.end()) is not None
 
 
-def looks_sane(text: str, lang: Optional[str]) -> bool:
+def dominant_script(text: Optional[str], ratio: float = 0.8) -> Optional[str]:
+    """"bn"/"en" if at least `ratio` of the script letters are of one script."""
+    if not text:
+        return None
+    n_bn = len(_BENGALI.findall(text))
+    n_en = len(_LATIN.findall(text))
+    total = n_bn + n_en
+    if not total:
+        return None
+    if n_bn >= ratio * total:
+        return "bn"
+    if n_en >= ratio * total:
+        return "en"
+    return None
+
+
+BANGLA_PROMPT = "আসসালামু আলাইকুম, আমি খাবার অর্ডার করতে চাই।"
+
+# Common ASR filler/hallucination outputs that are never a real final
+_GENERIC_TEXTS = frozenset({
+    "thank you", "thanks", "today", "ok", "okay",
+    # Whisper's stock silence hallucinations
+    "thanks for watching", "thank you for watching",
+    "like and subscribe", "see you next time",
+})
+_GENERIC_MAX_LEN = max(len(g) for g in _GENERIC_TEXTS)
+
+
+def looks_sane(
+    text: str,
+    lang: Optional[str],
+    scripts: Optional[Tuple[bool, bool]] = None,
+) -> bool:
+    """`scripts` may carry a scan_scripts(text) result the caller already has."""
     s = (text or "").strip()
     if len(s) < 2:
         return False
-    generic = {"thank you", "thanks", "today", "ok", "okay"}
-    if s.lower() in generic:
+    if len(s) <= _GENERIC_MAX_LEN and s.lower() in _GENERIC_TEXTS:
         return False
 
-    has_bn = bool(_BENGALI.search(s))
-    has_en = bool(_LATIN.search(s))
+    has_bn, has_en = scripts if scripts is not None else scan_scripts(s)
 
     if lang == "bn":
         return has_bn or (not has_en and len(s) > 3)
@@ -279,36 +501,92 @@ def looks_sane(text: str, lang: Optional[str]) -> bool:
 def rms_i16(b: bytes) -> float:
     if not b:
         return 0.0
-    x = np.frombuffer(b, dtype=np.int16)
+    # count= tolerates a trailing odd byte on raw WS frames
+    x = np.frombuffer(b, dtype=np.int16, count=len(b) // 2)
     if x.size == 0:
         return 0.0
-    xf = x.astype(np.float32)
-    return float(np.sqrt(np.mean(xf * xf)))
+    # exact int64 sum of squares, no float32 copy or squared temp array
+    sq = int(np.einsum("i,i->", x, x, dtype=np.int64))
+    return math.sqrt(sq / x.size)
+
+
+def is_quiet_i16(b: bytes, thresh: float) -> bool:
+    """
+    rms_i16(b) < thresh, with a cheaper peak test first: RMS never exceeds
+    the peak, so a chunk whose peak is under `thresh` is quiet without the
+    sum of squares. Only louder chunks pay for the real RMS.
+    """
+    x = np.frombuffer(b, dtype=np.int16, count=len(b) // 2)
+    if x.size == 0:
+        return True
+    # max/min reductions instead of abs(): no temp, no int16 overflow at -32768
+    if max(int(x.max()), -int(x.min())) < thresh:
+        return True
+    return rms_i16(b) < thresh
+
+
+# finalize hands PcmRing.view() around; everything below reads it in place
+PcmBuffer = Union[bytes, bytearray, memoryview]
+
+# RIFF/WAVE header for PCM16 mono: 44 bytes, only sizes and rate vary
+_WAV_HDR = struct.Struct("<4sI4s4sIHHIIHH4sI")
+
+
+def pcm16_mono_to_wav_bytes(pcm_bytes: PcmBuffer, rate: int = 16000) -> bytes:
+    n = len(pcm_bytes)
+    header = _WAV_HDR.pack(
+        b"RIFF", 36 + n, b"WAVE",
+        b"fmt ", 16, 1, 1, rate, rate * 2, 2, 16,
+        b"data", n,
+    )
+    # one copy; works for bytes and memoryview alike
+    return header + pcm_bytes
 
 
-def pcm16_mono_to_wav_bytes(pcm_bytes: bytes, rate: int = 16000) -> bytes:
+def pcm16_mono_to_flac_bytes(pcm_bytes: PcmBuffer, rate: int = 16000) -> bytes:
+    x = np.frombuffer(pcm_bytes, dtype=np.int16, count=len(pcm_bytes) // 2)
     bio = io.BytesIO()
-    with wave.open(bio, "wb") as wf:
-        wf.setnchannels(1)
-        wf.setsampwidth(2)
-        wf.setframerate(rate)
-        wf.writeframes(pcm_bytes)
+    sf.write(bio, x, rate, format="FLAC", subtype="PCM_16")
     return bio.getvalue()
 
 
-async def groq_transcribe(pcm_bytes: bytes, lang: Optional[str], rate: int = 16000) -> Optional[str]:
-    if not GROQ_API_KEY:
+def encode_groq_upload(pcm_bytes: PcmBuffer, rate: int = 16000) -> Tuple[str, bytes, str]:
+    """
+    (filename, body, mime) for the Groq multipart upload.
+    Falls back to WAV if FLAC encoding is unavailable.
+    """
+    if GROQ_UPLOAD_FORMAT == "flac":
+        try:
+            return "audio.flac", pcm16_mono_to_flac_bytes(pcm_bytes, rate=rate), "audio/flac"
+        except Exception as e:
+            print("[ai-waiter-service] FLAC encode failed, sending WAV:", e)
+    return "audio.wav", pcm16_mono_to_wav_bytes(pcm_bytes, rate=rate), "audio/wav"
+
+
+async def groq_transcribe(
+    pcm_bytes: PcmBuffer,
+    lang: Optional[str],
+    rate: int = 16000,
+    upload: Optional[Tuple[str, bytes, str]] = None,
+) -> Optional[str]:
+    """
+    Final transcription via Groq. Pass a pre-encoded `upload` (from
+    encode_groq_upload) to reuse it across retries.
+    """
+    if not GROQ_API_KEY or GROQ_CLIENT is None:
         return None
     try:
-        wav_bytes = pcm16_mono_to_wav_bytes(pcm_bytes, rate=rate)
+        if upload is None:
+            upload = await asyncio.get_event_loop().run_in_executor(
+                None, encode_groq_upload, pcm_bytes, rate
+            )
         url = GROQ_BASE.rstrip("/") + "/openai/v1/audio/transcriptions"
         headers = {"Authorization": f"Bearer {GROQ_API_KEY}"}
         data = {"model": GROQ_MODEL, "response_format": "json"}
         if lang and lang not in ("auto", "", None):
             data["language"] = lang
-        files = {"file": ("audio.wav", wav_bytes, "audio/wav")}
-        async with httpx.AsyncClient(timeout=GROQ_TIMEOUT_MS / 1000) as client:
-            resp = await client.post(url, headers=headers, data=data, files=files)
+        files = {"file": upload}
+        resp = await GROQ_CLIENT.post(url, headers=headers, data=data, files=files)
         if resp.status_code >= 400:
             print("[ai-waiter-service] Groq error:", resp.status_code, resp.text[:200])
             return None
@@ -371,8 +649,9 @@ async def fetch_weather_bucket(lat: float, lon: float) -> Optional[str]:
             "longitude": lon,
             "current": "temperature_2m",
         }
-        async with httpx.AsyncClient(timeout=2.5) as client:
-            r = await client.get(WEATHER_API_BASE, params=params)
+        if HTTP_CLIENT is None:
+            return None
+        r = await HTTP_CLIENT.get(WEATHER_API_BASE, params=params)
         r.raise_for_status()
         data = r.json()
         cur = data.get("current") or {}
@@ -406,57 +685,74 @@ def _to_object_id_maybe(x: Optional[str]) -> Optional[ObjectId]:
         return None
 
 
+# tenant_hint -> (resolved_at, ObjectId | None), least recently used first.
+# Read from executor threads too, hence the lock.
+_TENANT_CACHE: "OrderedDict[str, Tuple[float, Optional[ObjectId]]]" = OrderedDict()
+_TENANT_CACHE_LOCK = threading.Lock()
+
+
 def resolve_tenant_id(tenant_hint: Optional[str]) -> Optional[ObjectId]:
     """
     Resolve a UI-provided tenant hint (slug/subdomain/code/name or _id string)
     into the actual ObjectId from tenants collections.
+    Lookups are memoized for TENANT_CACHE_TTL_S (misses for
+    TENANT_MISS_TTL_S), at most TENANT_CACHE_MAX hints.
     """
     if not tenant_hint:
         return None
 
+    now = time.monotonic()
+    with _TENANT_CACHE_LOCK:
+        hit = _TENANT_CACHE.get(tenant_hint)
+        if hit:
+            ttl = TENANT_CACHE_TTL_S if hit[1] is not None else TENANT_MISS_TTL_S
+            if (now - hit[0]) < ttl:
+                _TENANT_CACHE.move_to_end(tenant_hint)
+                return hit[1]
+            del _TENANT_CACHE[tenant_hint]
+
+    oid = _resolve_tenant_id_uncached(tenant_hint)
+    with _TENANT_CACHE_LOCK:
+        _TENANT_CACHE[tenant_hint] = (time.monotonic(), oid)
+        _TENANT_CACHE.move_to_end(tenant_hint)
+        while len(_TENANT_CACHE) > max(1, TENANT_CACHE_MAX):
+            _TENANT_CACHE.popitem(last=False)
+    return oid
+
+
+def _resolve_tenant_id_uncached(tenant_hint: str) -> Optional[ObjectId]:
     # 1) direct ObjectId-like
     try:
         return ObjectId(tenant_hint)
     except Exception:
         pass
 
-    # 2) look in transcripts DB tenants
+    q = {
+        "$or": [
+            {"slug": tenant_hint},
+            {"subdomain": tenant_hint},
+            {"code": tenant_hint},
+            {"name": tenant_hint},
+        ]
+    }
+
+    # 2) MENU_DB.tenants is the source of truth: one indexed $or lookup
     try:
-        t = DB.tenants.find_one(
-            {
-                "$or": [
-                    {"slug": tenant_hint},
-                    {"subdomain": tenant_hint},
-                    {"code": tenant_hint},
-                    {"name": tenant_hint},
-                ]
-            },
-            {"_id": 1},
-        )
+        t = TENANTS.find_one(q, {"_id": 1})
         if t and t.get("_id"):
             return t["_id"]
-    except Exception as e:
-        print("[ai-waiter-service] ⚠️ tenant lookup (qravy) failed:", e)
-
-    # 3) look in MENU_DB.tenants
-    try:
-        menu_tenants = _CLIENT[MENU_DB_NAME]["tenants"]
-        t2 = menu_tenants.find_one(
-            {
-                "$or": [
-                    {"slug": tenant_hint},
-                    {"subdomain": tenant_hint},
-                    {"code": tenant_hint},
-                    {"name": tenant_hint},
-                ]
-            },
-            {"_id": 1},
-        )
-        if t2 and t2.get("_id"):
-            return t2["_id"]
     except Exception as e:
         print("[ai-waiter-service] ⚠️ tenant lookup (MENU_DB) failed:", e)
 
+    # 3) legacy tenants copy in the transcripts DB (opt-in)
+    if TENANT_LOOKUP_TRANS_DB and TRANS_DB_NAME != MENU_DB_NAME:
+        try:
+            t2 = DB.tenants.find_one(q, {"_id": 1})
+            if t2 and t2.get("_id"):
+                return t2["_id"]
+        except Exception as e:
+            print("[ai-waiter-service] ⚠️ tenant lookup (qravy) failed:", e)
+
     return None
 
 
@@ -475,6 +771,59 @@ def build_menu_query(tenant: Optional[str]) -> Dict[str, Any]:
     return q
 
 
+# Server-side projections: visibility flags and alias cleanup are computed by
+# Mongo so only the fields we read come back over the wire.
+# Same semantics as vis.get("dineIn", vis.get("dinein", True)) is not False:
+# only an explicit False hides; "dinein" is consulted only when "dineIn" is
+# absent (an explicit null dineIn counts as visible, like the Python check).
+_DINE_IN_EXPR = {
+    "$ne": [
+        {
+            "$cond": [
+                {"$eq": [{"$type": "$visibility.dineIn"}, "missing"]},
+                "$visibility.dinein",
+                "$visibility.dineIn",
+            ]
+        },
+        False,
+    ]
+}
+_ONLINE_EXPR = {"$ne": ["$visibility.online", False]}
+_ALIASES_IN = {
+    "$filter": {
+        "input": {"$cond": [{"$isArray": "$aliases"}, "$aliases", []]},
+        "as": "a",
+        "cond": {"$and": [{"$eq": [{"$type": "$$a"}, "string"]}, {"$ne": ["$$a", ""]}]},
+    }
+}
+
+
+def _distinct_in_order(arr_expr: Dict[str, Any]) -> Dict[str, Any]:
+    """Dedup an array expression keeping first-seen order ($setUnion doesn't)."""
+    return {
+        "$reduce": {
+            "input": arr_expr,
+            "initialValue": [],
+            "in": {
+                "$cond": [
+                    {"$in": ["$$this", "$$value"]},
+                    "$$value",
+                    {"$concatArrays": ["$$value", ["$$this"]]},
+                ]
+            },
+        }
+    }
+
+
+# distinct non-empty aliases in document order (original case, for vocab /
+# menu hint, which truncate the list: order must be stable across refreshes)
+_ALIASES_EXPR = _distinct_in_order(_ALIASES_IN)
+# distinct lowercased aliases (matching only)
+_ALIASES_LC_EXPR = _distinct_in_order(
+    {"$map": {"input": _ALIASES_IN, "as": "a", "in": {"$toLower": "$$a"}}}
+)
+
+
 def fetch_menu_snapshot(tenant: Optional[str], limit: int = MENU_SNAPSHOT_MAX) -> Dict[str, Any]:
     """
     Build a compact, real-time slice of the menu (source of truth for the brain).
@@ -484,27 +833,32 @@ def fetch_menu_snapshot(tenant: Optional[str], limit: int = MENU_SNAPSHOT_MAX) -
         q = build_menu_query(tenant)
         print("[debug] menu query:", q)
 
-        cur = ITEMS.find(
-            q,
-            {
-                "_id": 1,
-                "name": 1,
-                "price": 1,
-                "categoryId": 1,
-                "category": 1,
-                "visibility": 1,
-                "status": 1,
-                "hidden": 1,
-                "aliases": 1,
-                "tags": 1,
-            },
-        ).limit(limit)
+        cur = ITEMS.aggregate(
+            [
+                {"$match": q},
+                {"$limit": limit},
+                {
+                    "$project": {
+                        "_id": 1,
+                        "name": 1,
+                        "price": 1,
+                        "categoryId": 1,
+                        "category": 1,
+                        "status": 1,
+                        "hidden": 1,
+                        "tags": 1,
+                        "dine_in": _DINE_IN_EXPR,
+                        "online": _ONLINE_EXPR,
+                        "aliases": _ALIASES_EXPR,
+                    }
+                },
+            ]
+        )
 
         items: List[Dict[str, Any]] = []
         for d in cur:
-            vis = d.get("visibility") or {}
-            dine_in_ok = vis.get("dineIn", vis.get("dinein", True)) is not False
-            online_ok = vis.get("online", True) is not False
+            dine_in_ok = d.get("dine_in", True)
+            online_ok = d.get("online", True)
 
             tags = d.get("tags") or []
 
@@ -561,7 +915,82 @@ def fetch_menu_snapshot(tenant: Optional[str], limit: int = MENU_SNAPSHOT_MAX) -
         }
 
 
+# (tenant, limit) -> (fetched_at, snapshot), least recently used first;
+# snapshots are treated as read-only
+_MENU_CACHE: "OrderedDict[Tuple[Optional[str], int], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+# (tenant, limit) -> in-flight fetch, shared by concurrent callers
+_MENU_INFLIGHT: Dict[Tuple[Optional[str], int], "asyncio.Future[Dict[str, Any]]"] = {}
+
+
+def _refresh_menu_snapshot(tenant: Optional[str], limit: int) -> "asyncio.Future[Dict[str, Any]]":
+    """Start (or join) a background fetch that refills _MENU_CACHE."""
+    key = (tenant, limit)
+    fut = _MENU_INFLIGHT.get(key)
+    if fut is not None:
+        return fut
+
+    async def _fetch() -> Dict[str, Any]:
+        try:
+            snapshot = await asyncio.get_event_loop().run_in_executor(
+                None, fetch_menu_snapshot, tenant, limit
+            )
+            _MENU_CACHE[key] = (time.monotonic(), snapshot)
+            _MENU_CACHE.move_to_end(key)
+            while len(_MENU_CACHE) > MENU_CACHE_MAX:
+                _MENU_CACHE.popitem(last=False)
+            return snapshot
+        finally:
+            _MENU_INFLIGHT.pop(key, None)
+
+    fut = asyncio.ensure_future(_fetch())
+    _MENU_INFLIGHT[key] = fut
+    return fut
+
+
+async def get_menu_snapshot(tenant: Optional[str], limit: int = MENU_SNAPSHOT_MAX) -> Dict[str, Any]:
+    """
+    TTL-cached fetch_menu_snapshot. A cold miss awaits the fetch (joining
+    one already in flight, e.g. the hello prefetch); an expired entry is
+    served as-is while a background refresh replaces it, unless it is past
+    the stale window, in which case it is dropped and refetched.
+    """
+    key = (tenant, limit)
+    hit = _MENU_CACHE.get(key)
+    if hit:
+        age = time.monotonic() - hit[0]
+        if age >= MENU_CACHE_TTL_S + MENU_CACHE_STALE_S:
+            _MENU_CACHE.pop(key, None)
+        else:
+            if age >= MENU_CACHE_TTL_S:
+                _refresh_menu_snapshot(tenant, limit)
+            _MENU_CACHE.move_to_end(key)
+            return hit[1]
+    # shielded: a cancelled caller must not cancel the fetch other turns share
+    return await asyncio.shield(_refresh_menu_snapshot(tenant, limit))
+
+
+async def prefetch_menu_snapshot(tenant: str) -> None:
+    """
+    Hello-time cache warm-up. Only tenants that resolve to an ObjectId are
+    fetched, so junk hints can't fill the cache or drive menu queries.
+    """
+    try:
+        oid = await asyncio.get_event_loop().run_in_executor(
+            None, resolve_tenant_id, tenant
+        )
+    except Exception as e:
+        print("[ai-waiter-service] menu prefetch: tenant lookup failed:", e)
+        return
+    if oid is not None and (tenant, MENU_SNAPSHOT_MAX) not in _MENU_CACHE:
+        _refresh_menu_snapshot(tenant, MENU_SNAPSHOT_MAX)
+
+
 def build_vocab_from_snapshot(snapshot: Dict[str, Any]) -> List[str]:
+    """Normalizer vocab for a snapshot, built once and kept on the (cached) snapshot."""
+    cached = snapshot.get("_vocab")
+    if cached is not None:
+        return cached
+
     vocab: List[str] = []
     for it in snapshot.get("items", []):
         n = it.get("name")
@@ -572,28 +1001,26 @@ def build_vocab_from_snapshot(snapshot: Dict[str, Any]) -> List[str]:
                 if a:
                     vocab.append(a)
 
-    seen = set()
-    out = []
-    for w in vocab:
-        if w not in seen:
-            seen.add(w)
-            out.append(w)
-        if len(out) >= VOCAB_MAX:
-            break
+    # ordered dedup in one pass, then cap
+    out = list(dict.fromkeys(vocab))[:VOCAB_MAX]
+    snapshot["_vocab"] = out
     return out
 
 
 # ---------- Shortlist helpers (context + candidates) ----------
 
+_CHANNEL_ALIASES: Dict[str, str] = {
+    **dict.fromkeys(("dine-in", "dinein", "dine_in", "table"), "dine-in"),
+    **dict.fromkeys(
+        ("online", "delivery", "pickup", "takeaway", "take-out", "takeout"), "online"
+    ),
+}
+
+
 def _normalize_channel(raw: Optional[str]) -> Optional[str]:
     if not raw:
         return None
-    v = raw.strip().lower()
-    if v in ("dine-in", "dinein", "dine_in", "table"):
-        return "dine-in"
-    if v in ("online", "delivery", "pickup", "takeaway", "take-out", "takeout"):
-        return "online"
-    return None
+    return _CHANNEL_ALIASES.get(raw.strip().lower())
 
 
 def _channel_allows(vis: Dict[str, Any], channel: Optional[str]) -> bool:
@@ -641,44 +1068,35 @@ def build_runtime_context(
     return {k: v for k, v in ctx.items() if v is not None}
 
 
-def _extract_cart_item_ids(dialog_state: Optional[Dict[str, Any]]) -> List[str]:
+def _extract_cart_item_ids(dialog_state: Optional[Dict[str, Any]]) -> Set[str]:
     """
     Best-effort extraction of itemIds already in cart / recently ordered.
     Works with loose shapes; safe if nothing there.
     """
-    ids: set[str] = set()
+    ids: Set[str] = set()
     if not dialog_state or not isinstance(dialog_state, dict):
-        return []
+        return ids
 
-    def ingest_list(lst):
+    # common patterns: cart.items, meta.items, and any top-level "items"
+    cart = dialog_state.get("cart")
+    meta = dialog_state.get("meta")
+    for lst in (
+        cart.get("items") if isinstance(cart, dict) else None,
+        meta.get("items") if isinstance(meta, dict) else None,
+        dialog_state.get("items"),
+    ):
         if not isinstance(lst, list):
-            return
+            continue
         for it in lst:
             if not isinstance(it, dict):
                 continue
-            iid = (
-                it.get("itemId")
-                or it.get("id")
-                or it.get("_id")
-            )
+            iid = it.get("itemId") or it.get("id") or it.get("_id")
             if iid:
                 s = str(iid).strip()
                 if s:
                     ids.add(s)
 
-    # common patterns
-    cart = dialog_state.get("cart")
-    if isinstance(cart, dict):
-        ingest_list(cart.get("items"))
-
-    meta = dialog_state.get("meta")
-    if isinstance(meta, dict):
-        ingest_list(meta.get("items"))
-
-    # generic: any top-level list named "items"
-    ingest_list(dialog_state.get("items"))
-
-    return list(ids)
+    return ids
 
 
 def build_suggestion_candidates(
@@ -696,6 +1114,20 @@ def build_suggestion_candidates(
     channel = context.get("channel")
     tod = context.get("timeOfDay")  # breakfast/lunch/evening/late
 
+    # ranking depends only on (snapshot, channel, timeOfDay): rank once per
+    # cached snapshot, hand out copies (callers may annotate rows)
+    cache = snapshot.setdefault("_suggest_rows", {})
+    ranked = cache.get((channel, tod))
+    if ranked is None:
+        ranked = cache[(channel, tod)] = _rank_suggestions(snapshot, channel, tod)
+    return [dict(r) for r in ranked[:limit]]
+
+
+def _rank_suggestions(
+    snapshot: Dict[str, Any],
+    channel: Optional[str],
+    tod: Optional[str],
+) -> List[Dict[str, Any]]:
     rows = []
     for it in snapshot.get("items", []):
         if it.get("status") != "active":
@@ -752,11 +1184,9 @@ def build_suggestion_candidates(
         )
 
     rows.sort(key=lambda r: r["_score"], reverse=True)
-    out = []
-    for r in rows[:limit]:
+    for r in rows:
         r.pop("_score", None)
-        out.append(r)
-    return out
+    return rows
 
 
 def build_upsell_candidates(
@@ -771,8 +1201,25 @@ def build_upsell_candidates(
       - no duplicates of cart items.
     """
     channel = context.get("channel")
-    cart_ids = set(_extract_cart_item_ids(dialog_state))
+    cart_ids = _extract_cart_item_ids(dialog_state)
+
+    # rank once per (snapshot, channel); only the cart filter is per turn
+    cache = snapshot.setdefault("_upsell_rows", {})
+    ranked = cache.get(channel)
+    if ranked is None:
+        ranked = cache[channel] = _rank_upsells(snapshot, channel)
+
+    out = []
+    for r in ranked:
+        if r["id"] in cart_ids:
+            continue
+        out.append(dict(r))
+        if len(out) >= limit:
+            break
+    return out
+
 
+def _rank_upsells(snapshot: Dict[str, Any], channel: Optional[str]) -> List[Dict[str, Any]]:
     drink_keys = ["drink", "juice", "soda", "coke", "pepsi", "milkshake", "shake", "lassi", "water"]
     side_keys = ["fries", "side", "wings", "nugget", "garlic bread"]
     dessert_keys = ["dessert", "brownie", "ice cream", "sundae", "pudding", "cake"]
@@ -790,8 +1237,6 @@ def build_upsell_candidates(
         rid = str(it.get("id") or it.get("_id") or "")
         if not rid:
             continue
-        if rid in cart_ids:
-            continue
 
         tags = [str(t).lower() for t in (it.get("tags") or [])]
         name = (it.get("name") or "").lower()
@@ -826,18 +1271,75 @@ def build_upsell_candidates(
         )
 
     rows.sort(key=lambda r: r["_score"], reverse=True)
-    out = []
-    for r in rows[:limit]:
+    for r in rows:
         r.pop("_score", None)
-        out.append(r)
-    return out
+    return rows
 
 
 # ---------- Deterministic pre-match (snapshot → DB fallback) ----------
 
-def _tokenize_lower(s: str) -> List[str]:
-    s = (s or "").lower()
-    return re.findall(r"[a-z\u0980-\u09FF]+(?:\s+[a-z\u0980-\u09FF]+)?", s)
+# per-snapshot memo of matched texts (see _match_in_snapshot)
+MATCH_MEMO_MAX = 512
+
+def _build_match_index(items: List[Dict[str, Any]]):
+    """
+    One scanner for all item names/aliases of a snapshot:
+      - rx: zero-width lookahead alternation (longest first), so finditer
+        visits every start position and reports the longest whole-word
+        candidate there
+      - by_cand: lowered candidate → indices of items that carry it
+      - prefixes: candidate → shorter candidates that are its prefixes
+        (they can match at the same position and must also count)
+    """
+    by_cand: Dict[str, List[int]] = {}
+    for idx, it in enumerate(items):
+        name = (it.get("name") or "").strip().lower()
+        cands = [name] + [a.strip().lower() for a in (it.get("aliases") or []) if a]
+        for c in cands:
+            if not c:
+                continue
+            lst = by_cand.setdefault(c, [])
+            if not lst or lst[-1] != idx:
+                lst.append(idx)
+
+    if not by_cand:
+        return None, by_cand, {}
+
+    ordered = sorted(by_cand, key=len, reverse=True)
+    rx = re.compile(r"(?=\b(" + "|".join(map(re.escape, ordered)) + r")\b)")
+
+    prefixes: Dict[str, List[Tuple[str, Any]]] = {}
+    for c in ordered:
+        ps = [
+            (c[:k], re.compile(re.escape(c[:k]) + r"\b"))
+            for k in range(1, len(c))
+            if c[:k] in by_cand
+        ]
+        if ps:
+            prefixes[c] = ps
+    return rx, by_cand, prefixes
+
+
+def normalize_in_snapshot(
+    text: str, snapshot: Dict[str, Any]
+) -> Tuple[str, List[Tuple[str, str, float]]]:
+    """
+    normalize_text against the snapshot's vocab. Results are memoized on the
+    snapshot (bounded, reset when full) like _match_in_snapshot hits.
+    """
+    memo = snapshot.setdefault("_norm_memo", {})
+    hit = memo.get(text)
+    if hit is None:
+        norm_text, changes = normalize_text(
+            text,
+            vocab=build_vocab_from_snapshot(snapshot),
+            fuzzy_threshold=FUZZY_THRESHOLD,
+        )
+        hit = (norm_text, tuple(changes))
+        if len(memo) >= MATCH_MEMO_MAX:
+            memo.clear()
+        memo[text] = hit
+    return hit[0], list(hit[1])
 
 
 def _match_in_snapshot(norm_text: str, snapshot: Dict[str, Any]) -> List[Dict[str, Any]]:
@@ -845,14 +1347,34 @@ def _match_in_snapshot(norm_text: str, snapshot: Dict[str, Any]) -> List[Dict[st
     text = (norm_text or "").lower()
     if not text.strip():
         return []
-    hits = []
-    for it in snapshot.get("items", []):
-        name = (it.get("name") or "").strip()
-        aliases = [a.strip() for a in (it.get("aliases") or []) if a]
-        cand_strings = [name.lower()] + [a.lower() for a in aliases]
-        if any(re.search(rf"\b{re.escape(c)}\b", text) for c in cand_strings if c):
-            hits.append(it)
-    return hits
+    items = snapshot.get("items", [])
+
+    # built once per snapshot object (cached snapshots are reused across turns)
+    index = snapshot.get("_match_index")
+    if index is None:
+        index = _build_match_index(items)
+        snapshot["_match_index"] = index
+    rx, by_cand, prefixes = index
+    if rx is None:
+        return []
+
+    # repeated utterances within a snapshot's lifetime ("repeat that",
+    # retries) reuse the hit list; bounded, reset when full
+    memo = snapshot.setdefault("_match_memo", {})
+    hits = memo.get(text)
+    if hits is None:
+        hit_idx = set()
+        for m in rx.finditer(text):
+            c = m.group(1)
+            hit_idx.update(by_cand[c])
+            for pc, prx in prefixes.get(c, ()):
+                if prx.match(text, m.start()):
+                    hit_idx.update(by_cand[pc])
+        hits = tuple(sorted(hit_idx))
+        if len(memo) >= MATCH_MEMO_MAX:
+            memo.clear()
+        memo[text] = hits
+    return [items[i] for i in hits]
 
 
 def _db_fallback_search(tenant_hint: Optional[str], norm_text: str, limit: int = 10) -> List[Dict[str, Any]]:
@@ -861,7 +1383,7 @@ def _db_fallback_search(tenant_hint: Optional[str], norm_text: str, limit: int =
     text = (norm_text or "").strip()
     if not text:
         return []
-    tokens = list(set(_tokenize_lower(text)))[:6]
+    tokens = fallback_tokens(text, limit=6)
     if not tokens:
         return []
 
@@ -873,24 +1395,28 @@ def _db_fallback_search(tenant_hint: Optional[str], norm_text: str, limit: int =
     q = {"$and": [q_base, {"$or": regexes + alias_regexes}]}
     print("[debug] DB fallback query:", q)
 
-    cur = ITEMS.find(
-        q,
-        {
-            "_id": 1,
-            "name": 1,
-            "price": 1,
-            "category": 1,
-            "categoryId": 1,
-            "aliases": 1,
-            "status": 1,
-            "hidden": 1,
-            "visibility": 1,
-        },
-    ).limit(limit)
+    cur = ITEMS.aggregate(
+        [
+            {"$match": q},
+            {"$limit": limit},
+            {
+                "$project": {
+                    "_id": 1,
+                    "name": 1,
+                    "price": 1,
+                    "category": 1,
+                    "categoryId": 1,
+                    "status": 1,
+                    "hidden": 1,
+                    "dine_in": _DINE_IN_EXPR,
+                    "aliases_lc": _ALIASES_LC_EXPR,
+                }
+            },
+        ]
+    )
     out = []
     for d in cur:
-        vis = d.get("visibility") or {}
-        dine_in_ok = vis.get("dineIn", vis.get("dinein", True)) is not False
+        dine_in_ok = d.get("dine_in", True)
         out.append(
             {
                 "id": str(d.get("_id")),
@@ -901,7 +1427,7 @@ def _db_fallback_search(tenant_hint: Optional[str], norm_text: str, limit: int =
                 "available": (not bool(d.get("hidden")))
                 and (d.get("status") == "active")
                 and dine_in_ok,
-                "aliases": d.get("aliases") or [],
+                "aliases": d.get("aliases_lc") or [],
             }
         )
     return out
@@ -949,17 +1475,25 @@ async def call_brain_and_push(
     dialog_state: Optional[Dict[str, Any]] = None,
     locale: Optional[str] = None,
     context: Optional[Dict[str, Any]] = None,
-    suggestion_candidates: Optional[List[Dict[str, Any]]] = None,
-    upsell_candidates: Optional[List[Dict[str, Any]]] = None,
+    suggestion_candidates: Optional[Union[List[Dict[str, Any]], Callable[[], List[Dict[str, Any]]]]] = None,
+    upsell_candidates: Optional[Union[List[Dict[str, Any]], Callable[[], List[Dict[str, Any]]]]] = None,
+    stream_reply: bool = False,
 ) -> Dict[str, Any]:
     """
     Single entrypoint to brain.generate_reply.
     Forwards all structured context + candidates; pushes WS ai_reply.
+    stream_reply: also push ai_reply_partial {delta} frames while the model
+    generates (the final ai_reply still carries the full, corrected text).
     """
     print(
         f"[ai-waiter-service] 🧠 calling brain for transcript_norm: '{transcript_norm[:80]}...'"
     )
     reply_obj = {"replyText": "", "meta": {}}
+
+    async def push_delta(delta: str) -> None:
+        if not ws.closed:
+            await ws.send(ws_json({"t": "ai_reply_partial", "delta": delta}))
+
     try:
         # Call new brain signature; fallback to legacy if needed
         try:
@@ -977,6 +1511,7 @@ async def call_brain_and_push(
                 context=context,
                 suggestion_candidates=suggestion_candidates,
                 upsell_candidates=upsell_candidates,
+                on_reply_delta=push_delta if stream_reply else None,
             )
         except TypeError:
             # Legacy compatibility (no extra args)
@@ -1015,18 +1550,13 @@ async def call_brain_and_push(
 
         if not ws.closed:
             await ws.send(
-                json.dumps(
+                ws_json(
                     {
                         "t": "ai_reply",
                         "replyText": reply_obj["replyText"],
                         "meta": {
                             **meta,
-                            "normalizer": {
-                                "changed": [
-                                    {"from": a, "to": b, "score": s}
-                                    for (a, b, s) in norm_changes
-                                ]
-                            },
+                            "normalizer": normalizer_meta(norm_changes),
                         },
                     }
                 )
@@ -1041,14 +1571,7 @@ async def call_brain_and_push(
         traceback.print_exc()
         if not ws.closed:
             try:
-                await ws.send(
-                    json.dumps(
-                        {
-                            "t": "ai_reply_error",
-                            "message": "AI unavailable",
-                        }
-                    )
-                )
+                await ws.send(ERROR_FRAME)
             except Exception as send_err:
                 print(
                     "[ai-waiter-service] ❌ failed to send ai_reply_error:",
@@ -1067,11 +1590,25 @@ async def handle_conn(ws: WebSocketServerProtocol):
 
     # Start with env default (bn), but allow client override
     session_lang: Optional[str] = (WHISPER_LANG or "bn")
+    # stt_partial encoding: JSON text frames unless the client asks for msgpack
+    partial_msgpack = False
+    # ai_reply_partial frames while the LLM generates, if the client asks
+    reply_stream = False
     tenant_hint: Optional[str] = None
     branch_hint: Optional[str] = None
     channel_hint: Optional[str] = None
 
     last_detected_lang = None
+    # decoded audio (bytes) in a row that lang-ID put in last_detected_lang
+    lang_agree_bytes = 0
+
+    def locked_lang() -> Optional[str]:
+        """session_lang, else the detected language once it has held long enough."""
+        if session_lang:
+            return session_lang
+        if lang_agree_bytes >= LANG_LOCK_MIN_MS * rate * 2 // 1000:
+            return last_detected_lang
+        return None
 
     # ⭐ NEW: user TZ, GEO, localHour (from frontend "hello")
     user_tz: Optional[str] = None
@@ -1083,30 +1620,50 @@ async def handle_conn(ws: WebSocketServerProtocol):
 
     seg = Segmenter(bytes_per_sec=rate * 2, min_ms=500, max_ms=2000)
 
-    work_q: asyncio.Queue = asyncio.Queue(maxsize=1)
+    # single-slot hand-off to the STT worker: newest chunk wins
+    latest_chunk: Optional[bytearray] = None
+    dropped_chunks = 0
+    # pending-chunk merge limit in bytes (recomputed when hello sets the rate)
+    coalesce_cap = CHUNK_COALESCE_MS * rate * 2 // 1000
+    chunk_evt = asyncio.Event()
     closed = asyncio.Event()
-
-    all_pcm = bytearray()
+    # set while the worker has nothing queued or in flight (finalize drain)
+    worker_idle = asyncio.Event()
+    worker_idle.set()
+    # shorter worker chunks (< 0.25s @16k) aren't worth a decode
+    MIN_CHUNK_BYTES = 8000
+
+    # newest 60s of PCM, preallocated (re-sized on hello if rate changes)
+    MAX_ACCUM_SECONDS = 60
+    all_pcm = PcmRing(MAX_ACCUM_SECONDS * rate)
     last_partial_text = None
+    # running transcript: text of every chunk the worker decoded, in order.
+    # Segmenter chunks are consecutive and non-overlapping, so unless one was
+    # dropped (stream_gap) this covers all speech except the segmenter tail.
+    stream_parts: List[str] = []
+    stream_gap = False
 
     closing = False
     final_sent = False
 
-    def cap_buffer():
-        MAX_ACCUM_BYTES = 60 * rate * 2
-        nonlocal all_pcm
-        if len(all_pcm) > MAX_ACCUM_BYTES:
-            all_pcm = all_pcm[-MAX_ACCUM_BYTES:]
+    partial_pending = asyncio.Event()
+    latest_partial: Optional[str] = None
+    # (pcm, stt result) of the last chunk the worker decoded
+    last_decoded: Optional[Tuple[bytearray, Tuple[str, List[Tuple[float, float]], Optional[str]]]] = None
 
     async def worker():
-        nonlocal last_partial_text, final_sent, last_detected_lang
-        MIN_CHUNK_BYTES = 8000
+        nonlocal last_partial_text, final_sent, last_detected_lang, latest_partial
+        nonlocal latest_chunk, last_decoded, stream_gap, lang_agree_bytes
 
         while not closed.is_set():
             if final_sent:
                 break
-            chunk = await work_q.get()
-            if chunk is None:
+            if latest_chunk is None:
+                worker_idle.set()
+            await chunk_evt.wait()
+            chunk_evt.clear()
+            chunk, latest_chunk = latest_chunk, None
+            if chunk is None or closed.is_set():
                 break
             if final_sent:
                 break
@@ -1115,58 +1672,92 @@ async def handle_conn(ws: WebSocketServerProtocol):
                 print(
                     f"[ai-waiter-service] skipping short chunk: {len(chunk)} bytes"
                 )
+                stream_gap = True
                 continue
-            if rms_i16(chunk) < 350.0:
+            if is_quiet_i16(chunk, 350.0):
                 print(
                     "[ai-waiter-service] skip low-energy chunk (silence/noise)"
                 )
                 continue
 
+            # auto sessions: run lang-ID per chunk until enough audio agrees,
+            # then decode the rest with that language
+            chunk_lang = locked_lang()
             print(
-                f"[ai-waiter-service] transcribing chunk bytes={len(chunk)} lang={session_lang or 'auto'}"
-            )
-            text, _, det = await asyncio.get_event_loop().run_in_executor(
-                None, stt_np_float32, chunk, session_lang
+                f"[ai-waiter-service] transcribing chunk bytes={len(chunk)} lang={chunk_lang or 'auto'}"
             )
+            result = await stt_async(chunk, chunk_lang)
+            last_decoded = (chunk, result)
+            text, _, det = result
             if det:
+                if chunk_lang is None:
+                    if det == last_detected_lang:
+                        lang_agree_bytes += len(chunk)
+                    else:
+                        lang_agree_bytes = len(chunk)
                 last_detected_lang = det
+            if text and not final_sent:
+                stream_parts.append(text)
             if text and not final_sent and not ws.closed:
                 last_partial_text = text
-                has_bn = bool(_BENGALI.search(text))
-                has_en = bool(_LATIN.search(text))
+                # script flags only tell us something when the language
+                # isn't pinned; explicit-lang sessions skip the scan
+                scripts = ""
+                if not session_lang:
+                    has_bn, has_en = scan_scripts(text)
+                    scripts = f" | has_bn={has_bn} has_en={has_en}"
                 print(
-                    f"[ai-waiter-service] 🔍 partial='{text[:50]}' | has_bn={has_bn} has_en={has_en} | "
+                    f"[ai-waiter-service] 🔍 partial='{text[:50]}'{scripts} | "
                     f"hint={session_lang} det={last_detected_lang}"
                 )
 
-                try:
-                    await ws.send(
-                        json.dumps(
-                            {
-                                "t": "stt_partial",
-                                "text": text,
-                                "ts": time.time(),
-                            }
-                        )
-                    )
-                    print(
-                        "[ai-waiter-service] stt_partial:",
-                        text[:120],
-                    )
-                except Exception as e:
-                    print(
-                        "[ai-waiter-service] stt_partial send failed:",
-                        e,
-                    )
-                    break
+                latest_partial = text
+                partial_pending.set()
+
+        worker_idle.set()
+
+    async def partial_flusher():
+        """
+        Send stt_partial frames, coalescing bursts into one latest-wins send.
+        """
+        while not closed.is_set():
+            await partial_pending.wait()
+            if closed.is_set():
+                break
+            await asyncio.sleep(PARTIAL_COALESCE_MS / 1000)
+            partial_pending.clear()
+
+            text = latest_partial
+            if not text or final_sent or ws.closed:
+                continue
+            frame = {
+                "t": "stt_partial",
+                "text": text,
+                "ts": time.time(),
+            }
+            try:
+                await ws.send(
+                    ws_msgpack(frame) if partial_msgpack else ws_json(frame)
+                )
+                print(
+                    "[ai-waiter-service] stt_partial:",
+                    text[:120],
+                )
+            except Exception as e:
+                print(
+                    "[ai-waiter-service] stt_partial send failed:",
+                    e,
+                )
+                break
 
     wtask = asyncio.create_task(worker())
+    ptask = asyncio.create_task(partial_flusher())
 
     try:
         print("[ai-waiter-service] client connected")
         try:
             if not ws.closed:
-                await ws.send(json.dumps({"t": "ack"}))
+                await ws.send(ACK_FRAME)
         except Exception as e:
             print("[ai-waiter-service] failed to send ack:", e)
 
@@ -1192,26 +1783,31 @@ async def handle_conn(ws: WebSocketServerProtocol):
             if isinstance(msg, (bytes, bytearray)):
                 if closing or final_sent:
                     continue
-                all_pcm += msg
-                cap_buffer()
+                all_pcm.write(msg)
 
+                # every frame goes to the segmenter: it only cuts by length,
+                # so dropping quiet frames would splice pauses and soft
+                # onsets out of the chunks; the worker skips quiet chunks
                 out = seg.push(msg)
                 if out:
-                    # keep only the freshest chunk
-                    try:
-                        while True:
-                            work_q.get_nowait()
-                    except asyncio.QueueEmpty:
-                        pass
-                    try:
-                        work_q.put_nowait(out)
-                    except asyncio.QueueFull:
-                        pass
+                    # worker still busy: merge with the pending chunk so
+                    # the next partial covers both, within the cap
+                    if latest_chunk is None:
+                        latest_chunk = out
+                    elif len(latest_chunk) + len(out) <= coalesce_cap:
+                        # pending chunk is ours alone: extend it in place
+                        latest_chunk += out
+                    else:
+                        dropped_chunks += 1
+                        stream_gap = True
+                        latest_chunk = out
+                    worker_idle.clear()
+                    chunk_evt.set()
                 continue
 
             # handle JSON control messages
             try:
-                data = json.loads(msg)
+                data = orjson.loads(msg)
             except Exception:
                 continue
             t = data.get("t")
@@ -1222,7 +1818,13 @@ async def handle_conn(ws: WebSocketServerProtocol):
                 session_id = data.get("sessionId") or session_id
                 user_id = data.get("userId") or user_id
                 rate = int(data.get("rate", 16000))
+                coalesce_cap = CHUNK_COALESCE_MS * rate * 2 // 1000
                 ch = int(data.get("ch", 1))
+                if not len(all_pcm) and all_pcm.cap != MAX_ACCUM_SECONDS * rate:
+                    all_pcm = PcmRing(MAX_ACCUM_SECONDS * rate)
+
+                partial_msgpack = data.get("enc") == "msgpack"
+                reply_stream = data.get("stream") is True
 
                 # language hint: 'bn' | 'en' | 'auto'
                 lang_hint = data.get("lang")
@@ -1235,6 +1837,18 @@ async def handle_conn(ws: WebSocketServerProtocol):
                 branch_hint = data.get("branch") or branch_hint
                 channel_hint = data.get("channel") or channel_hint
 
+                # English-locked session: load the English model off-loop
+                if session_lang == "en":
+                    asyncio.get_event_loop().run_in_executor(STT_POOL, ensure_en_model)
+
+                # open the Groq connection while the user is still speaking
+                asyncio.ensure_future(warm_groq())
+
+                # warm the menu cache while the user is still speaking;
+                # finalize joins this fetch instead of starting its own
+                if tenant_hint and (tenant_hint, MENU_SNAPSHOT_MAX) not in _MENU_CACHE:
+                    asyncio.ensure_future(prefetch_menu_snapshot(tenant_hint))
+
                 # ⭐ user timezone & geo from frontend
                 tz = data.get("tz")
                 if isinstance(tz, str) and tz:
@@ -1272,19 +1886,39 @@ async def handle_conn(ws: WebSocketServerProtocol):
                 )
                 break
 
-        # Small drain: let worker finish in-flight chunk (~300ms)
-        t0 = time.monotonic()
-        while not work_q.empty() and (time.monotonic() - t0) < 0.3:
-            await asyncio.sleep(0.01)
+        # Small drain: let worker finish queued/in-flight chunk (~300ms)
+        if not worker_idle.is_set():
+            try:
+                await asyncio.wait_for(worker_idle.wait(), timeout=0.3)
+            except asyncio.TimeoutError:
+                pass
 
         # Finalize
         if not final_sent:
-            last = seg.flush()
-            if last:
-                all_pcm += last
-                cap_buffer()
+            # The LLM path needs the climate bucket; it doesn't depend on the
+            # transcript, so fetch it while STT finalizes.
+            climate_task = (
+                asyncio.ensure_future(
+                    fetch_weather_bucket(user_geo["lat"], user_geo["lon"])
+                )
+                if user_geo
+                else None
+            )
+            # Same for the menu snapshot (normally already cached by the hello
+            # prefetch) and the persisted cart (sync pymongo → executor).
+            snapshot_task = asyncio.ensure_future(
+                get_menu_snapshot(tenant_hint, limit=MENU_SNAPSHOT_MAX)
+            )
+            cart_task = asyncio.get_event_loop().run_in_executor(
+                None, load_cart, tenant_hint or "unknown", session_id or "anon"
+            )
+
+            # every frame already went into all_pcm on receipt; the segmenter's
+            # remainder is a copy of the undecoded tail (< min_ms of speech)
+            tail = seg.flush()
 
-            final_bytes = bytes(all_pcm) if all_pcm else b""
+            # no more writes after this point, so a zero-copy view is safe
+            final_bytes = all_pcm.view() if len(all_pcm) else b""
             print(
                 f"[ai-waiter-service] finalization: total_bytes={len(final_bytes)}, "
                 f"last_partial='{last_partial_text}' lang={session_lang or 'auto'}"
@@ -1293,14 +1927,88 @@ async def handle_conn(ws: WebSocketServerProtocol):
             selected_text: Optional[str] = None
             selected_segs: List[Tuple[float, float]] = []
 
-            # Preference: explicit lang → detected → script
-            lang_pref = session_lang or last_detected_lang
+            # Streaming result: when the worker decoded every chunk, the
+            # utterance is already transcribed except the short segmenter
+            # tail. Use the running transcript as the partial and decode only
+            # the tail (in the background; awaited if the partial is used)
+            # instead of re-transcribing the whole buffer.
+            tail_fut = None
+            if (
+                stream_parts
+                and not stream_gap
+                and worker_idle.is_set()
+                and latest_chunk is None
+            ):
+                if (
+                    tail
+                    and len(tail) >= MIN_CHUNK_BYTES
+                    and not is_quiet_i16(tail, 350.0)
+                ):
+                    tail_fut = asyncio.ensure_future(
+                        stt_async(
+                            tail, locked_lang(), rate, final=True
+                        )
+                    )
+                stream_text = " ".join(stream_parts)
+                if stream_text != last_partial_text:
+                    print(
+                        f"[ai-waiter-service] streamed transcript: parts={len(stream_parts)} "
+                        f"'{stream_text[:80]}'"
+                    )
+                    last_partial_text = stream_text
+
+            # Preference: explicit lang → script-dominant partial → detected
+            # → any script. A partial that is clearly one script beats
+            # Whisper's lang-ID on one chunk and saves Groq's retry.
+            # scan the partial once; reused for lang_pref and looks_sane
+            p_scripts = scan_scripts(last_partial_text)
+            lang_pref = (
+                session_lang
+                or dominant_script(last_partial_text)
+                or last_detected_lang
+            )
             if not lang_pref and last_partial_text:
-                if _BENGALI.search(last_partial_text):
+                p_bn, p_en = p_scripts
+                if p_bn:
                     lang_pref = "bn"
-                elif _LATIN.search(last_partial_text):
+                elif p_en:
                     lang_pref = "en"
 
+            partial_ok = bool(
+                last_partial_text
+                and looks_sane(last_partial_text, lang_pref, p_scripts)
+            )
+
+            # The local full pass is only needed when neither Groq nor a
+            # sane partial ends up as the final; start it now so it runs
+            # while Groq is in flight instead of after a Groq timeout.
+            local_fut = None
+            if (
+                not partial_ok
+                and last_decoded is not None
+                and len(last_decoded[0]) == len(final_bytes)
+                and last_decoded[0] == final_bytes
+            ):
+                # the whole utterance was one chunk the worker already
+                # decoded: reuse, don't redo it
+                print(
+                    "[ai-waiter-service] final audio == last decoded chunk → reusing its result"
+                )
+                local_fut = asyncio.get_event_loop().create_future()
+                local_fut.set_result(last_decoded[1])
+            elif not partial_ok and len(final_bytes) >= 16000:
+                print(
+                    f"[ai-waiter-service] starting local full transcription: {len(final_bytes)} bytes"
+                )
+                local_fut = asyncio.ensure_future(
+                    stt_async(
+                        final_bytes,
+                        session_lang,
+                        rate,
+                        batched=True,  # whole utterance, many VAD segments
+                    )
+                )
+
             groq_used = False
             if (
                 GROQ_API_KEY
@@ -1314,42 +2022,63 @@ async def handle_conn(ws: WebSocketServerProtocol):
                     print(
                         "[ai-waiter-service] calling Groq for final…"
                     )
+                    # encode once; the language retry below reuses it
+                    groq_upload = await asyncio.get_event_loop().run_in_executor(
+                        None, encode_groq_upload, final_bytes, rate
+                    )
                     groq_text = await groq_transcribe(
-                        final_bytes, lang_pref, rate=rate
+                        final_bytes, lang_pref, rate=rate, upload=groq_upload
                     )
 
                     # single-retry on opposite language if obviously wrong
-                    if (
-                        groq_text
+                    g_scripts = scan_scripts(groq_text)
+                    g_bn, g_en = g_scripts
+                    # ...unless the last partial already has the expected
+                    # script: then keep it and skip the extra round-trip
+                    p_bn, p_en = p_scripts
+                    if groq_text and partial_ok and (
+                        (lang_pref == "bn" and g_en and not g_bn and p_bn)
+                        or (lang_pref == "en" and g_bn and not g_en and p_en)
+                    ):
+                        print(
+                            "[ai-waiter-service] Groq script mismatch, partial agrees → using partial"
+                        )
+                        groq_text = None
+                    elif (
+                        GROQ_LANG_RETRY
+                        and groq_text
                         and lang_pref == "bn"
-                        and _LATIN.search(groq_text)
-                        and not _BENGALI.search(groq_text)
+                        and g_en
+                        and not g_bn
                     ):
                         print(
                             "[ai-waiter-service] BN expected but got EN → retry en"
                         )
                         en_text = await groq_transcribe(
-                            final_bytes, "en", rate=rate
+                            final_bytes, "en", rate=rate, upload=groq_upload
                         )
                         if en_text:
                             groq_text = en_text
+                            g_scripts = None
                     elif (
-                        groq_text
+                        GROQ_LANG_RETRY
+                        and groq_text
                         and lang_pref == "en"
-                        and _BENGALI.search(groq_text)
-                        and not _LATIN.search(groq_text)
+                        and g_bn
+                        and not g_en
                     ):
                         print(
                             "[ai-waiter-service] EN expected but got BN → retry bn"
                         )
                         bn_text = await groq_transcribe(
-                            final_bytes, "bn", rate=rate
+                            final_bytes, "bn", rate=rate, upload=groq_upload
                         )
                         if bn_text:
                             groq_text = bn_text
+                            g_scripts = None
 
                     if groq_text and looks_sane(
-                        groq_text, lang_pref
+                        groq_text, lang_pref, g_scripts
                     ):
                         selected_text = groq_text
                         groq_used = True
@@ -1362,28 +2091,37 @@ async def handle_conn(ws: WebSocketServerProtocol):
                         e,
                     )
 
-            if not selected_text:
-                if last_partial_text and looks_sane(
-                    last_partial_text, lang_pref
-                ):
+            if selected_text:
+                if local_fut is not None:
+                    # Groq won; drop the local pass (no-op if already running)
+                    local_fut.cancel()
+                if tail_fut is not None:
+                    tail_fut.cancel()
+            else:
+                if partial_ok:
                     selected_text = last_partial_text
                     selected_segs = []
+                    if tail_fut is not None:
+                        try:
+                            tail_text, _, _ = await tail_fut
+                            if tail_text:
+                                selected_text = f"{selected_text} {tail_text}"
+                        except Exception as e:
+                            print(
+                                "[ai-waiter-service] tail transcription failed:",
+                                e,
+                            )
                     print(
                         "[ai-waiter-service] ✅ using last sane partial as final"
                     )
-                elif len(final_bytes) >= 16000:
+                elif local_fut is not None:
+                    if tail_fut is not None:
+                        tail_fut.cancel()
                     print(
                         f"[ai-waiter-service] fallback to local full transcription: {len(final_bytes)} bytes"
                     )
                     try:
-                        local_text, segs, det = (
-                            await asyncio.get_event_loop().run_in_executor(
-                                None,
-                                stt_np_float32,
-                                final_bytes,
-                                session_lang,
-                            )
-                        )
+                        local_text, segs, det = await local_fut
                         if det:
                             last_detected_lang = det
                             print(
@@ -1399,27 +2137,23 @@ async def handle_conn(ws: WebSocketServerProtocol):
                         )
 
             if selected_text and not ws.closed:
-                # Live menu snapshot (tenant-scoped)
-                snapshot = fetch_menu_snapshot(
-                    tenant_hint, limit=MENU_SNAPSHOT_MAX
-                )
-                vocab = build_vocab_from_snapshot(snapshot)
+                # Live menu snapshot (tenant-scoped), fetched since finalize began
+                snapshot = await snapshot_task
 
-                # Normalize with live vocab
-                norm_text, changes = normalize_text(
-                    selected_text,
-                    vocab=vocab,
-                    fuzzy_threshold=FUZZY_THRESHOLD,
-                )
+                # Normalize with live vocab (memoized per snapshot)
+                norm_text, changes = normalize_in_snapshot(selected_text, snapshot)
 
                 # Record USER turn
                 push_user(tenant_hint, session_id, norm_text)
 
                 # --------- Deterministic availability path ---------
                 matches = _match_in_snapshot(norm_text, snapshot)
+                match_source = "snapshot"
                 if not matches:
-                    matches = _db_fallback_search(
-                        tenant_hint, norm_text, limit=10
+                    match_source = "db"
+                    # sync pymongo: keep it off the event loop
+                    matches = await asyncio.get_event_loop().run_in_executor(
+                        None, _db_fallback_search, tenant_hint, norm_text, 10
                     )
 
                 if matches:
@@ -1433,7 +2167,7 @@ async def handle_conn(ws: WebSocketServerProtocol):
                     if not final_lang:
                         final_lang = (
                             "bn"
-                            if _BENGALI.search(norm_text)
+                            if scan_scripts(norm_text)[0]
                             else "en"
                         )
 
@@ -1453,34 +2187,17 @@ async def handle_conn(ws: WebSocketServerProtocol):
                         "branch": branch_hint,
                         "channel": channel_hint,
                         "fallback": False,
-                        "source": "snapshot"
-                        if matches
-                        and matches[0]
-                        in snapshot.get("items", [])
-                        else "db",
+                        "source": match_source,
                     }
                     try:
                         await ws.send(
-                            json.dumps(
+                            ws_json(
                                 {
                                     "t": "ai_reply",
                                     "replyText": reply_text,
                                     "meta": {
                                         **meta,
-                                        "normalizer": {
-                                            "changed": [
-                                                {
-                                                    "from": a,
-                                                    "to": b,
-                                                    "score": s,
-                                                }
-                                                for (
-                                                    a,
-                                                    b,
-                                                    s,
-                                                ) in changes
-                                            ]
-                                        },
+                                        "normalizer": normalizer_meta(changes),
                                     },
                                 }
                             )
@@ -1495,19 +2212,17 @@ async def handle_conn(ws: WebSocketServerProtocol):
                         )
 
                     # update context/state
-                    push_assistant(
-                        tenant_hint, session_id, reply_text
-                    )
-                    update_state(
+                    commit_turn(
                         tenant_hint,
                         session_id,
+                        assistant_text=reply_text,
                         meta=meta,
                         user_text=norm_text,
                     )
 
                     # persist transcript + deterministic answer
                     try:
-                        await writer_q.put(
+                        enqueue_transcript(
                             {
                                 "user": user_id,
                                 "session": session_id,
@@ -1537,17 +2252,16 @@ async def handle_conn(ws: WebSocketServerProtocol):
                         )
 
                     final_sent = True
+                    if climate_task is not None:
+                        climate_task.cancel()
+                    cart_task.cancel()
                     return  # ⛔ no LLM
 
                 # ---------------- LLM path ----------------
 
                 try:
                     if not ws.closed:
-                        await ws.send(
-                            json.dumps(
-                                {"t": "ai_reply_pending"}
-                            )
-                        )
+                        await ws.send(PENDING_FRAME)
                 except Exception:
                     pass
 
@@ -1566,10 +2280,8 @@ async def handle_conn(ws: WebSocketServerProtocol):
 
                     # ⭐ NEW: climate bucket from geo (if available)
                     climate_bucket = None
-                    if user_geo:
-                        climate_bucket = await fetch_weather_bucket(
-                            user_geo["lat"], user_geo["lon"]
-                        )
+                    if climate_task is not None:
+                        climate_bucket = await climate_task
 
                     # Build context + shortlists (now tz + localHour + climate aware)
                     ctx = build_runtime_context(
@@ -1584,7 +2296,11 @@ async def handle_conn(ws: WebSocketServerProtocol):
                     )
 
                     # 🔗 NEW: include persisted cart so brain can merge quantities
-                    cart_items = load_cart(tenant_hint or "unknown", session_id or "anon") or []
+                    try:
+                        cart_items = await cart_task or []
+                    except Exception as e:
+                        print("[ai-waiter-service] cart load failed:", e)
+                        cart_items = []
                     ctx["cartItems"] = [
                         {
                             "itemId": (
@@ -1598,8 +2314,9 @@ async def handle_conn(ws: WebSocketServerProtocol):
                         if int(it.get("qty") or it.get("quantity") or 0) > 0
                     ]
 
-                    suggestion_candidates = build_suggestion_candidates(snapshot, ctx, limit=40)
-                    upsell_candidates = build_upsell_candidates(snapshot, ctx, dialog_state, limit=16)
+                    # built by the brain only if the turn gets past its shortcuts
+                    suggestion_candidates = partial(build_suggestion_candidates, snapshot, ctx, limit=40)
+                    upsell_candidates = partial(build_upsell_candidates, snapshot, ctx, dialog_state, limit=16)
 
                     last_ai = await call_brain_and_push(
                         ws,
@@ -1625,6 +2342,7 @@ async def handle_conn(ws: WebSocketServerProtocol):
                         upsell_candidates=(
                             upsell_candidates
                         ),
+                        stream_reply=reply_stream,
                     )
                     print(
                         "[ai-waiter-service] 🧠 brain task completed"
@@ -1639,21 +2357,17 @@ async def handle_conn(ws: WebSocketServerProtocol):
                     traceback.print_exc()
 
                 # update context + dialog state
-                push_assistant(
-                    tenant_hint,
-                    session_id,
-                    last_ai.get("replyText") or "",
-                )
-                update_state(
+                commit_turn(
                     tenant_hint,
                     session_id,
+                    assistant_text=last_ai.get("replyText") or "",
                     meta=last_ai.get("meta"),
                     user_text=norm_text,
                 )
 
                 # store for finetune/export
                 try:
-                    await writer_q.put(
+                    enqueue_transcript(
                         {
                             "user": user_id,
                             "session": session_id,
@@ -1691,6 +2405,10 @@ async def handle_conn(ws: WebSocketServerProtocol):
                 print(
                     "[ai-waiter-service] ⚠️ no usable final produced"
                 )
+                if climate_task is not None:
+                    climate_task.cancel()
+                snapshot_task.cancel()
+                cart_task.cancel()
 
     except Exception as e:
         print(
@@ -1701,13 +2419,15 @@ async def handle_conn(ws: WebSocketServerProtocol):
         traceback.print_exc()
     finally:
         closed.set()
-        try:
-            await work_q.put(None)
-        except Exception:
-            pass
+        partial_pending.set()
+        chunk_evt.set()
         await asyncio.gather(
-            wtask, return_exceptions=True
+            wtask, ptask, return_exceptions=True
         )
+        if dropped_chunks:
+            print(
+                f"[ai-waiter-service] dropped {dropped_chunks} stale STT chunk(s) under load"
+            )
         print(
             "[ai-waiter-service] connection handler finished"
         )
@@ -1716,7 +2436,13 @@ async def handle_conn(ws: WebSocketServerProtocol):
 # ---------- App bootstrap ----------
 
 async def main():
-    global WRITER_TASK
+    global WRITER_TASK, ACOLL, GROQ_CLIENT, HTTP_CLIENT, WS_SERVER
+    ACOLL = AsyncIOMotorClient(MONGO_URI)[TRANS_DB_NAME].get_collection(
+        "transcripts", write_concern=WriteConcern(w=TRANSCRIPT_WRITE_W)
+    )
+    GROQ_CLIENT = make_groq_client()
+    asyncio.create_task(warm_groq())
+    HTTP_CLIENT = httpx.AsyncClient(timeout=2.5)
     WRITER_TASK = asyncio.create_task(writer())
 
     # Start Cart HTTP API in background
@@ -1724,9 +2450,10 @@ async def main():
 
     import signal
     loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
 
     def _schedule_shutdown():
-        asyncio.create_task(shutdown())
+        stop.set()
 
     try:
         loop.add_signal_handler(
@@ -1747,20 +2474,51 @@ async def main():
         ping_timeout=30,
         ping_interval=20,
         close_timeout=10,
-    ):
+        # frames are raw PCM and small JSON: permessage-deflate only burns
+        # CPU (zlib per frame) and adds per-connection compressor state
+        compression=None,
+        max_queue=32,
+    ) as server:
+        WS_SERVER = server
         print(
             f"[ai-waiter-service] WS listening on :{port}"
         )
-        await asyncio.Future()
+        await stop.wait()
+        await shutdown()
 
 
 async def shutdown():
+    # stop accepting and let live sessions close (their handlers finish and
+    # enqueue transcripts) before tearing down the pool/clients they use
+    if WS_SERVER is not None:
+        WS_SERVER.close()
+        await WS_SERVER.wait_closed()
     await writer_q.put(None)
     if WRITER_TASK:
         await WRITER_TASK
+    STT_POOL.shutdown(wait=False, cancel_futures=True)
+    for name, close in (
+        ("Groq", GROQ_CLIENT.aclose if GROQ_CLIENT is not None else None),
+        ("HTTP", HTTP_CLIENT.aclose if HTTP_CLIENT is not None else None),
+        ("brain", close_brain_http),
+    ):
+        if close is None:
+            continue
+        try:
+            await close()
+        except Exception as e:
+            print(f"[ai-waiter-service] {name} client close failed:", e)
 
 
 if __name__ == "__main__":
+    try:
+        import uvloop  # faster event loop (Linux/macOS); stdlib loop otherwise
+
+        uvloop.install()
+        print("[ai-waiter-service] using uvloop")
+    except ImportError:
+        pass
+
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
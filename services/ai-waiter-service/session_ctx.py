@@ -1,5 +1,6 @@
 from __future__ import annotations
-from collections import defaultdict, deque
+from collections import OrderedDict, defaultdict, deque
+from functools import lru_cache
 from typing import Deque, Dict, List, Tuple, Optional, Any
 import os
 import time
@@ -10,10 +11,24 @@ MAX_TURNS = int(os.environ.get("SESSION_CTX_TURNS", "3"))
 # idle TTL in seconds (default: 10 minutes)
 SESSION_IDLE_TTL_SECONDS = int(os.environ.get("SESSION_IDLE_TTL_SECONDS", "600"))
 
+# min seconds between idle-session sweeps
+SESSION_GC_INTERVAL_SECONDS = float(
+    os.environ.get("SESSION_GC_INTERVAL_SECONDS", str(min(60, max(1, SESSION_IDLE_TTL_SECONDS // 10))))
+)
+
+# hard cap on live sessions; past it the least recently active one is
+# dropped, so a burst can't outgrow memory before the idle sweep runs
+MAX_SESSIONS = int(os.environ.get("SESSION_MAX_SESSIONS", "10000"))
+
 # session key is (tenant, sessionId)
 Key = Tuple[str, str]
 
-SESSION_CTX: Dict[Key, Deque[Dict[str, str]]] = defaultdict(
+# turns are stored compactly as (role, content); dicts are built on read
+Turn = Tuple[str, str]
+ROLE_USER = "user"
+ROLE_ASSISTANT = "assistant"
+
+SESSION_CTX: Dict[Key, Deque[Turn]] = defaultdict(
     lambda: deque(maxlen=MAX_TURNS)
 )
 SESSION_STATE: Dict[Key, Dict[str, Any]] = {}  # tiny dialog state
@@ -21,45 +36,67 @@ SESSION_STATE: Dict[Key, Dict[str, Any]] = {}  # tiny dialog state
 # optional in-memory cart snapshot (per tenant+session, GC'ed with sessions)
 CART_STATE: Dict[Key, Dict[str, Any]] = {}
 
-# last activity timestamps for TTL
-SESSION_LAST_ACTIVITY: Dict[Key, float] = {}
+# last activity timestamps for TTL, least recently active first
+SESSION_LAST_ACTIVITY: "OrderedDict[Key, float]" = OrderedDict()
 
+_last_gc = 0.0
 
+
+# the same (tenant, sid) pair is keyed several times per turn
+@lru_cache(maxsize=4096)
 def skey(tenant: Optional[str], sid: Optional[str]) -> Key:
     return ((tenant or "unknown").strip(), (sid or "anon").strip())
 
 
 def _touch(key: Key) -> None:
     """
-    Mark a session as active 'now'.
+    Mark a session as active 'now' (moves it to the young end). A new
+    session past MAX_SESSIONS evicts the least recently active one.
     """
+    if key in SESSION_LAST_ACTIVITY:
+        SESSION_LAST_ACTIVITY.move_to_end(key)
+    elif MAX_SESSIONS > 0 and len(SESSION_LAST_ACTIVITY) >= MAX_SESSIONS:
+        old, _ = SESSION_LAST_ACTIVITY.popitem(last=False)
+        _drop(old)
     SESSION_LAST_ACTIVITY[key] = time.time()
 
 
+def _drop(key: Key) -> None:
+    SESSION_CTX.pop(key, None)
+    SESSION_STATE.pop(key, None)
+    CART_STATE.pop(key, None)
+
+
 def _gc_expired() -> None:
     """
     Remove sessions that have been idle longer than SESSION_IDLE_TTL_SECONDS.
-    Called opportunistically on each public API call.
+    Called opportunistically on each public API call, but sweeps at most
+    once per SESSION_GC_INTERVAL_SECONDS. Walks from the oldest entry and
+    stops at the first live one, so a sweep costs O(expired).
     """
+    global _last_gc
     ttl = SESSION_IDLE_TTL_SECONDS
     if ttl <= 0:
         return
 
     now = time.time()
+    if now - _last_gc < SESSION_GC_INTERVAL_SECONDS:
+        return
+    _last_gc = now
+
     # Collect first to avoid mutating while iterating
-    expired: List[Key] = [
-        k for k, ts in SESSION_LAST_ACTIVITY.items()
-        if (now - ts) > ttl
-    ]
+    expired: List[Key] = []
+    for k, ts in SESSION_LAST_ACTIVITY.items():
+        if (now - ts) <= ttl:
+            break
+        expired.append(k)
 
     if not expired:
         return
 
     for k in expired:
         SESSION_LAST_ACTIVITY.pop(k, None)
-        SESSION_CTX.pop(k, None)
-        SESSION_STATE.pop(k, None)
-        CART_STATE.pop(k, None)
+        _drop(k)
 
     if expired:
         print(f"[session_ctx] GC cleared {len(expired)} idle session(s)")
@@ -69,7 +106,7 @@ def get_history(tenant: Optional[str], sid: Optional[str]) -> List[Dict[str, str
     key = skey(tenant, sid)
     _gc_expired()
     _touch(key)
-    return list(SESSION_CTX[key])
+    return [{"role": r, "content": c} for r, c in SESSION_CTX[key]]
 
 
 def push_user(tenant: Optional[str], sid: Optional[str], text: str) -> None:
@@ -77,7 +114,7 @@ def push_user(tenant: Optional[str], sid: Optional[str], text: str) -> None:
         return
     key = skey(tenant, sid)
     _gc_expired()
-    SESSION_CTX[key].append({"role": "user", "content": text})
+    SESSION_CTX[key].append((ROLE_USER, text))
     _touch(key)
 
 
@@ -86,7 +123,7 @@ def push_assistant(tenant: Optional[str], sid: Optional[str], text: str) -> None
         return
     key = skey(tenant, sid)
     _gc_expired()
-    SESSION_CTX[key].append({"role": "assistant", "content": text})
+    SESSION_CTX[key].append((ROLE_ASSISTANT, text))
     _touch(key)
 
 
@@ -113,36 +150,64 @@ def update_state(
     """
     key = skey(tenant, sid)
     _gc_expired()
+    _set_state(key, meta)
+    _touch(key)
+
 
+def commit_turn(
+    tenant: Optional[str],
+    sid: Optional[str],
+    *,
+    assistant_text: str,
+    meta: Dict[str, Any] | None,
+    user_text: str | None = None,
+) -> None:
+    """
+    End-of-turn write: push_assistant + update_state in one call
+    (one key build, one GC check, one touch).
+    """
+    key = skey(tenant, sid)
+    _gc_expired()
+    if assistant_text:
+        SESSION_CTX[key].append((ROLE_ASSISTANT, assistant_text))
+    _set_state(key, meta)
+    _touch(key)
+
+
+def _set_state(key: Key, meta: Dict[str, Any] | None) -> None:
     prev = SESSION_STATE.get(key, {}) or {}
 
-    intent = (meta or {}).get("intent") or prev.get("intent")
-    lang = (meta or {}).get("language") or prev.get("lang")
-    items = (meta or {}).get("items") or prev.get("items") or []
+    meta = meta or {}
+    meta_items = meta.get("items") or []
+
+    intent = meta.get("intent") or prev.get("intent")
+    lang = meta.get("language") or prev.get("lang")
+    items = meta_items or prev.get("items") or []
 
     # cap items to 4, map to compact representation
+    # at most 4 kept, so a linear scan beats formatting + hashing a key
     comp_items: List[Dict[str, Any]] = []
-    seen = set()
     for it in items:
-        nm = (it or {}).get("name")
-        iid = (it or {}).get("itemId")
+        if not it:
+            continue
+        nm = it.get("name")
         if not nm:
             continue
-        k = f"{iid or ''}:{nm}"
-        if k in seen:
+        iid = it.get("itemId")
+        if any(c["name"] == nm and (c["id"] or "") == (iid or "") for c in comp_items):
             continue
         comp_items.append({"name": nm, "id": iid})
-        seen.add(k)
         if len(comp_items) >= 4:
             break
 
     unresolved: List[str] = list(prev.get("unresolved", []))
     # naive slot guess: if intent=order and no explicit quantity in items → unresolved "quantity"
     if intent == "order":
-        has_qty = any(
-            ((it or {}).get("quantity") or 0)
-            for it in (meta or {}).get("items") or []
-        )
+        has_qty = False
+        for it in meta_items:
+            if it and it.get("quantity"):
+                has_qty = True
+                break
         if not has_qty and "quantity" not in unresolved:
             unresolved.append("quantity")
     else:
@@ -156,8 +221,6 @@ def update_state(
         "unresolved": unresolved[:4],
     }
 
-    _touch(key)
-
 
 # -------- Optional cart helpers (used by cart HTTP API / other services) --------
 
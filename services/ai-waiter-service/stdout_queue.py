@@ -0,0 +1,109 @@
+# services/ai-waiter-service/stdout_queue.py
+import atexit
+import io
+import queue
+import sys
+import threading
+from typing import Optional
+
+
+class QueuedStdout(io.TextIOBase):
+    """
+    Drop-in sys.stdout whose write() only enqueues; a daemon thread does the
+    real (possibly blocking) write. print() on the event loop then never
+    waits on a slow stdout pipe (docker logs / k8s backpressure).
+
+    Bounded: if the drain falls behind, lines are dropped and counted
+    rather than growing memory or blocking the caller.
+    """
+
+    def __init__(self, target, maxsize: int = 10000):
+        super().__init__()
+        self.target = target
+        self.q: "queue.Queue[Optional[str]]" = queue.Queue(maxsize=maxsize)
+        # bumped by any writing thread, read/reset by the drain thread
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+        self._thread = threading.Thread(
+            target=self._drain, name="stdout-drain", daemon=True
+        )
+        self._thread.start()
+
+    # stream identity is the real stdout's: libraries that inspect
+    # encoding / fileno() / isatty() see the same values as before
+    @property
+    def encoding(self) -> str:
+        return self.target.encoding
+
+    @property
+    def errors(self) -> Optional[str]:
+        return self.target.errors
+
+    @property
+    def buffer(self):
+        # raw bytes written here bypass the queue (and its ordering)
+        return self.target.buffer
+
+    def fileno(self) -> int:
+        return self.target.fileno()
+
+    def isatty(self) -> bool:
+        return self.target.isatty()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, s: str) -> int:
+        try:
+            self.q.put_nowait(s)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+        return len(s)
+
+    def flush(self) -> None:
+        # the drain thread flushes after every batch
+        pass
+
+    def _drain(self) -> None:
+        q = self.q
+        while True:
+            s = q.get()
+            parts = []
+            stop = False
+            # one write per burst instead of one per print() fragment
+            while True:
+                if s is None:
+                    stop = True
+                    break
+                parts.append(s)
+                try:
+                    s = q.get_nowait()
+                except queue.Empty:
+                    break
+            with self._dropped_lock:
+                dropped, self.dropped = self.dropped, 0
+            if dropped:
+                parts.append(f"[stdout] dropped {dropped} writes\n")
+            try:
+                self.target.write("".join(parts))
+                self.target.flush()
+            except Exception:
+                pass
+            if stop:
+                return
+
+    def close_and_drain(self, timeout: float = 2.0) -> None:
+        """Flush what's queued (at exit); waits for room, never drops the stop."""
+        try:
+            self.q.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+
+def install(maxsize: int = 10000) -> QueuedStdout:
+    out = QueuedStdout(sys.stdout, maxsize=maxsize)
+    sys.stdout = out
+    atexit.register(out.close_and_drain)
+    return out
@@ -1,36 +1,272 @@
 from __future__ import annotations
 
+import asyncio
 import os
-from typing import List, Tuple, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple, Optional, Union
 
+import ctranslate2
 import numpy as np
 from faster_whisper import WhisperModel
 
-# Config (same env knobs you already use)
+try:  # faster-whisper >= 1.1
+    from faster_whisper import BatchedInferencePipeline
+except ImportError:
+    BatchedInferencePipeline = None
+
+
+def pick_device(device: str) -> str:
+    """'auto' → cuda when CTranslate2 sees a GPU, else cpu."""
+    if device != "auto":
+        return device
+    try:
+        return "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
+    except Exception:
+        return "cpu"
+
+
+def pick_compute_type(device: str) -> str:
+    """
+    Fastest legal quantization for the device:
+      - cpu: int8_bfloat16 where the ISA has BF16 (AVX512-BF16 / AMX),
+        else int8
+      - cuda: int8_float16, else float16, else bfloat16 (some GPUs
+        report INT8 as unsupported)
+    """
+    dev = "cuda" if device == "cuda" else "cpu"
+    try:
+        supported = ctranslate2.get_supported_compute_types(dev)
+    except Exception as e:
+        print(f"[stt] could not query {dev} compute types: {e}")
+        supported = set()
+    if dev == "cpu":
+        return "int8_bfloat16" if "int8_bfloat16" in supported else "int8"
+    for ct in ("int8_float16", "float16", "bfloat16"):
+        if ct in supported:
+            return ct
+    return "float32"
+
+
+# Config (same env knobs you already use; WHISPER_COMPUTE_TYPE still overrides)
 WHISPER_MODEL = os.environ.get("WHISPER_MODEL", "tiny")
-WHISPER_DEVICE = os.environ.get("WHISPER_DEVICE", "cpu")
-WHISPER_COMPUTE_TYPE = os.environ.get("WHISPER_COMPUTE_TYPE", "int8")
+WHISPER_DEVICE = pick_device(os.environ.get("WHISPER_DEVICE", "cpu"))
+WHISPER_COMPUTE_TYPE = os.environ.get("WHISPER_COMPUTE_TYPE") or pick_compute_type(
+    WHISPER_DEVICE
+)
+# default cap on CPU decode workers (each is a full transcribe() in parallel)
+_CPU_WORKERS_CAP = 4
+
+
+def default_num_workers(device: str) -> int:
+    """
+    Small, explicit default for WHISPER_NUM_WORKERS:
+      - cuda: 1 (CTranslate2 loads one model replica per worker on the GPU)
+      - cpu: cores this process may run on (affinity / cpuset, not the
+        host's count), capped at _CPU_WORKERS_CAP
+    """
+    if device == "cuda":
+        return 1
+    try:
+        n = len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        n = os.cpu_count() or 1
+    return max(1, min(n, _CPU_WORKERS_CAP))
+
+
+# parallel transcribe() calls the model accepts, and intra-op threads each
+WHISPER_NUM_WORKERS = int(
+    os.environ.get("WHISPER_NUM_WORKERS") or default_num_workers(WHISPER_DEVICE)
+)
+WHISPER_CPU_THREADS = int(os.environ.get("WHISPER_CPU_THREADS", "1"))
 
 print(
     f"[stt] Loading Faster-Whisper model={WHISPER_MODEL} "
-    f"device={WHISPER_DEVICE} compute={WHISPER_COMPUTE_TYPE}"
+    f"device={WHISPER_DEVICE} compute={WHISPER_COMPUTE_TYPE} "
+    f"workers={WHISPER_NUM_WORKERS} threads={WHISPER_CPU_THREADS}"
 )
 
 _model = WhisperModel(
     WHISPER_MODEL,
     device=WHISPER_DEVICE,
     compute_type=WHISPER_COMPUTE_TYPE,
+    num_workers=WHISPER_NUM_WORKERS,
+    cpu_threads=WHISPER_CPU_THREADS,
 )
 
+# Optional English-only model (e.g. Systran/faster-distil-whisper-small.en) for
+# sessions locked to "en"; bn/auto keep the multilingual model. "" disables.
+WHISPER_EN_MODEL = os.environ.get("WHISPER_EN_MODEL", "").strip()
+
+_en_model: Optional[WhisperModel] = None
+_en_model_lock = threading.Lock()
+
+
+def ensure_en_model() -> Optional[WhisperModel]:
+    """Load WHISPER_EN_MODEL once (thread-safe); None if unset or it failed."""
+    global _en_model, WHISPER_EN_MODEL
+    if not WHISPER_EN_MODEL:
+        return None
+    if _en_model is not None:
+        return _en_model
+    with _en_model_lock:
+        if _en_model is None and WHISPER_EN_MODEL:
+            print(f"[stt] Loading English model={WHISPER_EN_MODEL}")
+            try:
+                _en_model = WhisperModel(
+                    WHISPER_EN_MODEL,
+                    device=WHISPER_DEVICE,
+                    compute_type=WHISPER_COMPUTE_TYPE,
+                    num_workers=WHISPER_NUM_WORKERS,
+                    cpu_threads=WHISPER_CPU_THREADS,
+                )
+            except Exception as e:
+                # don't retry a broken model on every chunk
+                print(f"[stt] English model load failed, using {WHISPER_MODEL}: {e}")
+                WHISPER_EN_MODEL = ""
+    return _en_model
+
+
+def _model_for(language: Optional[str]) -> WhisperModel:
+    if language == "en":
+        return ensure_en_model() or _model
+    return _model
+
+
+# Segments decoded per batch on long (final) passes; 0 disables batching
+WHISPER_BATCH_SIZE = int(os.environ.get("WHISPER_BATCH_SIZE", "8"))
+
+_batched: Dict[int, Any] = {}
+
+
+def _batched_for(model: WhisperModel):
+    """BatchedInferencePipeline over `model`, built once; None if unavailable."""
+    if BatchedInferencePipeline is None or WHISPER_BATCH_SIZE <= 0:
+        return None
+    pipe = _batched.get(id(model))
+    if pipe is None:
+        pipe = _batched.setdefault(id(model), BatchedInferencePipeline(model=model))
+    return pipe
+
+
+# Languages to warm up at import ("" disables warmup)
+WHISPER_WARMUP_LANGS = os.environ.get("WHISPER_WARMUP_LANGS", "bn,en")
+
+
+def _warmup() -> None:
+    """
+    Run one decode per target language on 1s of silence so CTranslate2
+    allocates its workspace and spins up threads before the first real
+    chunk arrives.
+    """
+    silence = np.zeros(16000, dtype=np.float32)
+    for lang in (v.strip() for v in WHISPER_WARMUP_LANGS.split(",")):
+        if not lang:
+            continue
+        try:
+            segments, _ = _model.transcribe(
+                silence,
+                language=lang,
+                beam_size=1,
+                best_of=1,
+                vad_filter=False,
+                word_timestamps=False,
+            )
+            # segments is lazy; consume it so decoding actually runs
+            for _ in segments:
+                pass
+            print(f"[stt] warmup done lang={lang}")
+        except Exception as e:
+            print(f"[stt] warmup failed lang={lang}: {e}")
+
+    # Real decodes run with vad_filter=True; the Silero VAD model is loaded on
+    # first use, so load it here too (silence → no speech → no decode).
+    try:
+        segments, _ = _model.transcribe(silence, vad_filter=True)
+        for _ in segments:
+            pass
+        print("[stt] warmup done vad")
+    except Exception as e:
+        print(f"[stt] warmup failed vad: {e}")
+
+
+_warmup()
+
+
+# Per-thread float32 scratch for the int16 → float32 rescale (sized for 60s @16k)
+_F32_SCRATCH = threading.local()
+_F32_SCRATCH_MIN_SAMPLES = 60 * 16000
+_I16_SCALE = np.float32(1.0 / 32768.0)
+
+
+def _f32_scratch(n: int) -> np.ndarray:
+    buf = getattr(_F32_SCRATCH, "buf", None)
+    if buf is None or buf.size < n:
+        buf = np.empty(max(n, _F32_SCRATCH_MIN_SAMPLES), dtype=np.float32)
+        _F32_SCRATCH.buf = buf
+    return buf[:n]
+
+
+def prealloc_scratch() -> None:
+    """Thread initializer: allocate the scratch up front, not on first chunk."""
+    _f32_scratch(_F32_SCRATCH_MIN_SAMPLES)
+
+
+# Silero VAD inside transcribe() for partial (streaming) chunks. On by
+# default: partials are stitched into the final transcript, and without VAD
+# Whisper hallucinates on silence ("Thank you.", "you"). "0" trades that
+# for a cheaper partial decode; finals/batched decodes always keep it.
+STT_PARTIAL_VAD = os.environ.get("STT_PARTIAL_VAD", "1") == "1"
+
+# Buffers whose peak |sample| stays under this are silence: skip the model.
+# Peak, not RMS, so a long final buffer with one short word still decodes.
+STT_SILENCE_PEAK = int(os.environ.get("STT_SILENCE_PEAK", "200"))
+
+# Decoding kwargs per (raw lang hint, vad), built once (lightweight settings; adjust if needed)
+_DECODE_OPTS: Dict[Tuple[Optional[str], bool], Dict[str, Any]] = {}
+_DECODE_OPTS_MAX = 32  # hints are client-supplied; don't cache unbounded junk
+
+
+def _decode_opts(lang_hint: Optional[str], vad: bool = True) -> Dict[str, Any]:
+    opts = _DECODE_OPTS.get((lang_hint, vad))
+    if opts is not None:
+        return opts
+
+    language = None
+    if isinstance(lang_hint, str):
+        v = lang_hint.strip().lower()
+        if v and v not in ("auto", "auto_detect"):
+            language = v
+
+    opts = {
+        "language": language,
+        "beam_size": 1,
+        "vad_filter": vad,
+        "word_timestamps": False,
+        # utterances are short; conditioning on earlier windows only adds
+        # prompt tokens and lets one bad window derail the next
+        "condition_on_previous_text": False,
+    }
+    if len(_DECODE_OPTS) < _DECODE_OPTS_MAX:
+        _DECODE_OPTS[(lang_hint, vad)] = opts
+    return opts
+
 
 def stt_np_float32(
-    pcm_bytes: bytes,
+    pcm_bytes: Union[bytes, bytearray, memoryview],
     lang_hint: Optional[str] = None,
     rate: int = 16000,
+    batched: bool = False,
+    vad: bool = True,
 ) -> Tuple[str, List[Tuple[float, float]], Optional[str]]:
     """
     Decode 16-bit mono PCM -> text using Faster-Whisper.
 
+    batched=True decodes the VAD speech segments of a long buffer in
+    parallel batches (BatchedInferencePipeline) when available.
+    vad=False skips the Silero pass (caller already bounded the speech);
+    batched decodes always use it.
+
     Returns:
       text: full transcript
       segments: list of (start, end) seconds
@@ -40,36 +276,41 @@ def stt_np_float32(
         return "", [], None
 
     # 16-bit PCM -> float32 [-1, 1]
-    audio = np.frombuffer(pcm_bytes, dtype=np.int16)
+    # no copy for bytes/bytearray/memoryview; drops a trailing odd byte
+    audio = np.frombuffer(pcm_bytes, dtype=np.int16, count=len(pcm_bytes) // 2)
     if audio.size == 0:
         return "", [], None
+    # max/min reductions, no abs() temp; microseconds vs. an encoder pass
+    if max(int(audio.max()), -int(audio.min())) < STT_SILENCE_PEAK:
+        return "", [], None
 
-    audio = audio.astype("float32") / 32768.0
+    # one fused multiply into reused memory; decoding below finishes before
+    # this thread can reuse the scratch
+    audio = np.multiply(audio, _I16_SCALE, out=_f32_scratch(audio.size))
 
-    language = None
-    if isinstance(lang_hint, str):
-        v = lang_hint.strip().lower()
-        if v and v not in ("auto", "auto_detect"):
-            language = v
+    opts = _decode_opts(lang_hint, vad or batched)
+    language = opts["language"]
 
     segments_out: List[Tuple[float, float]] = []
     text_parts: List[str] = []
 
-    # Lightweight settings; adjust if needed
-    segments, info = _model.transcribe(
-        audio,
-        language=language,
-        beam_size=1,
-        vad_filter=True,
-        word_timestamps=False,
-    )
+    model = _model_for(language)
+    pipe = _batched_for(model) if batched else None
+    if pipe is not None:
+        segments, info = pipe.transcribe(audio, batch_size=WHISPER_BATCH_SIZE, **opts)
+    else:
+        segments, info = model.transcribe(audio, **opts)
 
+    # single pass; parts are pre-stripped and non-empty so join needs no strip
+    add_seg = segments_out.append
+    add_text = text_parts.append
     for seg in segments:
-        segments_out.append((float(seg.start), float(seg.end)))
-        if seg.text:
-            text_parts.append(seg.text.strip())
+        add_seg((seg.start, seg.end))
+        t = seg.text.strip() if seg.text else ""
+        if t:
+            add_text(t)
 
-    full_text = " ".join(text_parts).strip()
+    full_text = " ".join(text_parts)
 
     detected_lang: Optional[str] = None
     try:
@@ -83,3 +324,45 @@ def stt_np_float32(
         detected_lang = language
 
     return full_text, segments_out, detected_lang
+
+
+# Dedicated Whisper pool: STT jobs never queue behind unrelated executor work.
+# CTranslate2 releases the GIL while decoding, so num_workers threads keep the
+# model's replicas busy; more threads would only wait inside CTranslate2.
+STT_POOL = ThreadPoolExecutor(
+    max_workers=max(1, WHISPER_NUM_WORKERS),
+    thread_name_prefix="whisper",
+    initializer=prealloc_scratch,
+)
+
+
+# Partial (live-caption) decodes may hold at most this many pool threads, so a
+# finalizing turn always finds a free worker instead of queueing behind other
+# sessions' partials. Finals are never throttled.
+STT_PARTIAL_SLOTS = int(
+    os.environ.get("STT_PARTIAL_SLOTS", str(max(1, WHISPER_NUM_WORKERS - 1)))
+)
+_partial_slots = asyncio.Semaphore(max(1, STT_PARTIAL_SLOTS))
+
+
+async def stt_async(
+    pcm_bytes: Union[bytes, bytearray, memoryview],
+    lang_hint: Optional[str] = None,
+    rate: int = 16000,
+    batched: bool = False,
+    final: bool = False,
+) -> Tuple[str, List[Tuple[float, float]], Optional[str]]:
+    """
+    Awaitable stt_np_float32 on STT_POOL; the event loop never blocks on a
+    decode. final=True (or batched) marks finalize work, which skips the
+    partial-slot limit and always runs VAD.
+    """
+    loop = asyncio.get_running_loop()
+    if final or batched:
+        return await loop.run_in_executor(
+            STT_POOL, stt_np_float32, pcm_bytes, lang_hint, rate, batched, True
+        )
+    async with _partial_slots:
+        return await loop.run_in_executor(
+            STT_POOL, stt_np_float32, pcm_bytes, lang_hint, rate, batched, STT_PARTIAL_VAD
+        )
@@ -0,0 +1,59 @@
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from menu_tokens import fallback_tokens  # noqa: E402
+
+MENU = [
+    {"name": "Chicken Biryani", "aliases": ["biriyani", "বিরিয়ানি"]},
+    {"name": "Spicy Chicken Wings", "aliases": ["wings"]},
+    {"name": "Iced Latte", "aliases": ["cold coffee"]},
+    {"name": "Beef Burger", "aliases": []},
+]
+
+
+def db_regex_matches(text):
+    """Same test as the $regex/$options:i filters in _db_fallback_search."""
+    toks = fallback_tokens(text, limit=6)
+    out = []
+    for it in MENU:
+        fields = [it["name"]] + it["aliases"]
+        if any(re.search(re.escape(t), f, re.I) for t in toks for f in fields):
+            out.append(it["name"])
+    return out
+
+
+def test_non_menu_utterance_matches_nothing():
+    assert db_regex_matches("I want something to drink") == []
+    assert db_regex_matches("can i get a table for two") == []
+    assert db_regex_matches("what time do you close") == []
+
+
+def test_baseline_pairs_then_content_words():
+    assert fallback_tokens("i want burger") == ["i want", "burger"]
+    assert fallback_tokens("one burger please") == ["one burger", "please", "burger"]
+
+
+def test_filler_and_short_words_are_not_tokens():
+    toks = fallback_tokens("I want something to drink")
+    assert "i" not in toks
+    assert "want" not in toks
+    assert "something" not in toks
+
+
+def test_one_word_item_inside_a_sentence_matches():
+    assert db_regex_matches("i want burger") == ["Beef Burger"]
+    assert db_regex_matches("one burger please") == ["Beef Burger"]
+
+
+def test_menu_phrases_still_match():
+    assert db_regex_matches("one beef burger please") == ["Beef Burger"]
+    assert db_regex_matches("biriyani") == ["Chicken Biryani"]
+    assert db_regex_matches("iced latte") == ["Iced Latte"]
+
+
+def test_one_short_word_yields_nothing():
+    assert fallback_tokens("i") == []
+    assert fallback_tokens("") == []
@@ -6,23 +6,23 @@ class Segmenter:
         self.min = int(bytes_per_sec * (min_ms/1000))
         self.max = int(bytes_per_sec * (max_ms/1000))
 
+    # Emitted chunks are bytearrays handed off whole (the segmenter never
+    # touches them again), so emitting costs at most one copy.
     def push(self, chunk: bytes):
         self.buf.extend(chunk)
         # If we have at least max, emit a fixed-size chunk (streaming)
         if len(self.buf) >= self.max:
-            out = bytes(self.buf[:self.max])
-            self.buf = self.buf[self.max:]
+            out = self.buf[:self.max]
+            del self.buf[:self.max]  # in place, no new remainder buffer
             return out
         # Otherwise, as soon as we hit min, emit whatever we have (low latency)
         if len(self.buf) >= self.min:
-            out = bytes(self.buf)
-            self.buf.clear()
+            out, self.buf = self.buf, bytearray()
             return out
         return None
 
     def flush(self):
         if self.buf:
-            out = bytes(self.buf)
-            self.buf.clear()
+            out, self.buf = self.buf, bytearray()
             return out
         return None